@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Memory allocations benchmark of python_value() hydration, with tracemalloc.
+
+Per Field class, hydrates --rows synthetic rows (database side values, as a
+select() hands them to python_value()) and reports, scaled per 100_000 rows:
+    blocks: memory blocks held by the hydrated values.
+    peak: peak bytes traced while hydrating, temporaries included.
+    retained: bytes still traced after the values are dropped (leaks, caches).
+
+Unlike speed, allocations are deterministic on 1 Python version, so the
+--baseline gate is tight: a case fails when it is over --tolerance times
+its baseline plus a small slack, for the noise of the interpreter itself.
+
+Run from the repo root:
+    PYTHONPATH=. python3 benchmarks/bench_allocations.py
+    PYTHONPATH=. python3 benchmarks/bench_allocations.py --baseline benchmarks/allocations_baseline.json
+Refresh the baseline after an intended change:
+    PYTHONPATH=. python3 benchmarks/bench_allocations.py --output benchmarks/allocations_baseline.json"""
+
+
+import argparse
+import gc
+import json
+import platform
+import re
+import sys
+import tracemalloc
+
+from datetime import datetime, timezone
+
+import peewee
+
+import peewee_extra_fields
+
+
+ROWS = 2_000
+PER_ROWS = 100_000
+SLACK = {"blocks": 256, "peak": 64 * 1024, "retained": 64 * 1024}
+
+# Field class name: (keyword arguments, python side values cycled over rows).
+SAMPLES = {
+    "CountryISOCodeField": ({}, ["ar", "de", "us", "jp", "br", "uy"]),
+    "ColorHexadecimalField": ({}, ["#bebebe", "#ff0000", "#00ff00", "#123456"]),
+    "IBANISOCodeField": ({}, ["DE44 5001 0517 5407 3249 31",
+                              "GB82 WEST 1234 5698 7654 32",
+                              "FR14 2004 1010 0505 0001 3M02 606"]),
+    "CSVField": ({}, ["peewee,extra,fields", "a,b", "1,2,3,4,5,6,7,8"]),
+    "JSONField": ({}, [{"a": [1, 2, 3], "b": {"c": "d"}}, {"id": 42}, [1, 2]]),
+    "CurrencyISOCodeField": ({}, ["usd", "eur", "ars", "jpy"]),
+    "LanguageISOCodeField": ({}, ["en", "es", "de", "ja"]),
+    "SWIFTISOCodeField": ({}, ["DEUTDEFF", "NEDSZAJJXXX", "BOFAUS3N"]),
+    "USSocialSecurityNumberField": ({}, ["205-21-9000", "536-90-4399"]),
+    "HexadecimalField": ({}, ["deadbeef", "cafebabe"]),
+    "IPAddressField": ({}, ["192.168.0.1", "10.0.0.1"]),
+    "SemVerField": ({}, ["1.2.3", "10.0.0"]),
+}
+
+
+def hydrate(field, values: list):
+    python_value = field.python_value
+    return [python_value(value) for value in values]
+
+
+def bench_field(field_class, kwargs: dict, samples: list, rows: int) -> dict:
+    field = field_class(**kwargs)
+    db_values = [field.db_value(sample) for sample in samples]
+    values = [db_values[index % len(db_values)] for index in range(rows)]
+    hydrate(field, values[:100])  # Warm up, lazy imports and first time caches.
+    gc.collect()
+    tracemalloc.start()
+    try:  # Snapshots are dropped at once, to not count them as retained.
+        blocks = -len(tracemalloc.take_snapshot().traces)
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        results = hydrate(field, values)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks += len(tracemalloc.take_snapshot().traces)
+        del results
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    scale = PER_ROWS / rows
+    return {"blocks": round(blocks * scale),
+            "peak": round((peak - start) * scale),
+            "retained": round(max(end - start, 0) * scale)}
+
+
+def run(rows: int, only: str=None) -> dict:
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "peewee": peewee.__version__,
+            "version": peewee_extra_fields.__version__,
+            "rows": rows,
+            "per_rows": PER_ROWS,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "fields": {}, "skipped": {},
+    }
+    for name, (kwargs, samples) in SAMPLES.items():
+        if only and not re.search(only, name):
+            continue
+        field_class = getattr(peewee_extra_fields, name)
+        if field_class is None:  # Optional dependency not installed.
+            results["skipped"][name] = "optional dependency not installed"
+            continue
+        result = results["fields"][name] = bench_field(
+            field_class, kwargs, samples, rows)
+        print(f"{name:30} blocks {result['blocks']:10,} peak "
+              f"{result['peak'] / 2**20:8.2f} MiB retained "
+              f"{result['retained'] / 2**20:6.2f} MiB")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the cases over tolerance times the baseline plus SLACK."""
+    regressions = []
+    for name, cases in results["fields"].items():
+        base_cases = baseline["fields"].get(name, {})
+        for case, value in cases.items():
+            if case in base_cases and value > base_cases[case] * tolerance + SLACK[case]:
+                regressions.append((f"{name}.{case}", value, base_cases[case]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=ROWS,
+                        help=f"Rows hydrated per Field ({ROWS:_}).")
+    parser.add_argument("--output", help="Save the results as JSON to this path.")
+    parser.add_argument("--baseline", help="Compare against this results JSON.")
+    parser.add_argument("--only", help="Only the names matching this Regex.")
+    parser.add_argument("--tolerance", type=float, default=1.1,
+                        help="Growth ratio that fails the gate (1.1).")
+    args = parser.parse_args()
+
+    print(f"Per {PER_ROWS:,} rows, hydrating {args.rows:,} rows per Field.")
+    results = run(args.rows, args.only)
+    if args.output:
+        with open(args.output, "w") as file_object:
+            json.dump(results, file_object, indent=2, sort_keys=True)
+            file_object.write("\n")
+    if args.baseline:
+        with open(args.baseline) as file_object:
+            baseline = json.load(file_object)
+        if baseline["meta"]["python"].rsplit(".", 1)[0] != results["meta"]["python"].rsplit(".", 1)[0]:
+            print(f"WARNING baseline is from Python {baseline['meta']['python']}, "
+                  "object sizes differ between Python versions.")
+        regressions = compare(results, baseline, args.tolerance)
+        for case, value, base in regressions:
+            print(f"REGRESSION {case}: {value:,} over the baseline {base:,}.")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over x{args.tolerance} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
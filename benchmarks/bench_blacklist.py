@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""CharFieldCustom blacklist benchmark, a moderation list of 200_000 entries.
+
+"old" is the previous sorted tuple, scanned by "in" on every value,
+"new" are the frozenset, the word lookups, the Aho-Corasick automaton
+and the MappedWordList binary search on a mmap-ed file.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_blacklist.py"""
+
+
+import os
+import random
+import tempfile
+import time
+import timeit
+
+from peewee_extra_fields import CharFieldCustom, MappedWordList
+
+
+ENTRIES, VALUES = 200_000, 2_000
+
+
+def main():
+    rnd = random.Random(42)
+    words = [f"bad{i:06d}" for i in range(ENTRIES)]
+    values = [rnd.choice(words) if i % 10 == 0 else f"good comment {i}"
+              for i in range(VALUES)]
+    sentences = [f"some {value} text" for value in values]
+    old_list = tuple(sorted(set(words)))
+
+    def check(field, data):
+        blocked = 0
+        for value in data:
+            try:
+                field.db_value(value)
+            except ValueError:
+                blocked += 1
+        return blocked
+
+    folder = tempfile.mkdtemp()
+    path = MappedWordList.write(os.path.join(folder, "words.txt"), words)
+    cases = {}
+    for name, data, kwargs in (
+            ("exact", values, {"blacklist": words}),
+            ("exact mmap", values, {"blacklist": MappedWordList(path)}),
+            ("word", sentences, {"blacklist": words, "list_match": "word"}),
+            ("word mmap", sentences, {"blacklist": MappedWordList(path),
+                                      "list_match": "word"}),
+            ("substring", sentences, {"blacklist": words,
+                                      "list_match": "substring"})):
+        started = time.perf_counter()
+        cases[name] = (CharFieldCustom(**kwargs), data,
+                       time.perf_counter() - started)
+
+    print(f"{ENTRIES:,} entries, {VALUES:,} values, best of 3.")
+    old = min(timeit.repeat(lambda: [value.lower() in old_list for value in values],
+                            number=1, repeat=3))
+    print(f"{'old tuple':12}: {old * 1000:9.2f} ms")
+    for name, (field, data, build) in cases.items():
+        new = min(timeit.repeat(lambda: check(field, data), number=1, repeat=3))
+        print(f"{name:12}: {new * 1000:9.2f} ms, built in {build * 1000:7.1f} ms, "
+              f"{check(field, data)} blocked")
+    os.remove(path)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
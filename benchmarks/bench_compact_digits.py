@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compact digits storage benchmark, text vs compact=True on SQLite.
+
+Stores the same identifiers as VARCHAR text and as INTEGER, both indexed,
+and reports the pages of the table and of the index (dbstat) and the time
+of 10_000 indexed lookups.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_compact_digits.py [rows]"""
+
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from peewee import Model, SqliteDatabase
+
+from peewee_extra_fields import (FIELD_TYPES, CNZipCodeField, HROIBField,
+                                 USSocialSecurityNumberField)
+
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def main():
+    rnd = random.Random(42)
+    samples = {
+        CNZipCodeField: lambda: f"{rnd.randint(10_000, 999_999):06d}",
+        HROIBField: lambda: f"{rnd.randint(0, 10 ** 11 - 1):011d}",
+        USSocialSecurityNumberField: lambda: (
+            f"{rnd.randint(1, 665):03d}-{rnd.randint(1, 99):02d}-"
+            f"{rnd.randint(1, 9999):04d}"),
+    }
+    print(f"{ROWS:,} rows per table, sizes in KiB.")
+    for field_class, sample in samples.items():
+        values = [sample() for _ in range(ROWS)]
+        probes = rnd.sample(values, 10_000)
+        for compact in (False, True):
+            path = os.path.join(tempfile.mkdtemp(), "bench.db")
+            db = SqliteDatabase(path, field_types=FIELD_TYPES)
+
+            class Identifier(Model):
+                code = field_class(compact=compact, index=True)
+                class Meta:
+                    database = db
+
+            db.create_tables([Identifier])
+            with db.atomic():
+                for offset in range(0, ROWS, 10_000):
+                    Identifier.insert_many(
+                        [(value, ) for value in values[offset:offset + 10_000]],
+                        fields=[Identifier.code]).execute()
+            sizes = dict(db.execute_sql(
+                "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+            seconds = min(timeit.repeat(lambda: [
+                Identifier.select().where(Identifier.code == probe).exists()
+                for probe in probes], number=1, repeat=3))
+            print(f"{field_class.__name__:28} {'compact' if compact else 'text':7}: "
+                  f"table {sizes['identifier'] // 1024:7,}, index "
+                  f"{sizes['identifier_code'] // 1024:7,}, lookups "
+                  f"{seconds * 1000:6.0f} ms")
+            db.close()
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
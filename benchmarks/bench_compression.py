@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Compressor benchmark, size ratio against encode and decode cost.
+
+Small documents are where a shared dictionary trained from sample rows
+helps most, without it they barely compress.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_compression.py"""
+
+
+import json
+import random
+import timeit
+
+from peewee_extra_fields import Compressor
+from peewee_extra_fields.compression import zstandard
+
+
+def json_document(items: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    return json.dumps({"invoice": seed, "currency": "USD", "items": [
+        {"sku": f"SKU-{rnd.randint(1, 9999):04d}", "quantity": rnd.randint(1, 9),
+         "price": round(rnd.random() * 100, 2), "description": "Product item"}
+        for _ in range(items)]})
+
+
+def xml_document(items: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    return "<invoice currency='USD'>" + "".join(
+        f"<item sku='SKU-{rnd.randint(1, 9999):04d}'><quantity>"
+        f"{rnd.randint(1, 9)}</quantity><price>{rnd.random() * 100:.2f}"
+        "</price></item>" for _ in range(items)) + "</invoice>"
+
+
+def compressors(samples: list) -> dict:
+    result = {"zlib": Compressor("zlib", threshold=0),
+              "zlib level 1": Compressor("zlib", level=1, threshold=0),
+              "lzma": Compressor("lzma", threshold=0),
+              "zlib dictionary": Compressor("zlib", threshold=0,
+                  dictionary=Compressor.train_dictionary(samples, 8_192))}
+    if zstandard:
+        result["zstd"] = Compressor("zstd", threshold=0)
+        result["zstd dictionary"] = Compressor("zstd", threshold=0,
+            dictionary=Compressor.train_dictionary(samples, 8_192, "zstd"))
+    return result
+
+
+if __name__ in "__main__":
+    print(__doc__)
+    for kind, make in (("json", json_document), ("xml", xml_document)):
+        samples = [make(random.randint(1, 20), seed) for seed in range(2_000)]
+        for label, compressor in compressors(samples).items():
+            for size, items in (("small", 3), ("medium", 50), ("large", 2_000)):
+                raw = make(items, 1_000_000).encode("utf-8")
+                blob = compressor.compress(raw)
+                number = max(1, 200_000 // len(raw))
+                encode = min(timeit.repeat(
+                    lambda: compressor.compress(raw), number=number, repeat=3))
+                decode = min(timeit.repeat(
+                    lambda: compressor.decompress(blob), number=number, repeat=3))
+                print(f"{kind:<5} {label:<16} {size:<7} {len(raw):>9,} -> "
+                      f"{len(blob):>8,} bytes ratio {len(raw) / len(blob):>5.2f} "
+                      f"encode {encode / number * 1e6:>9.1f} us "
+                      f"decode {decode / number * 1e6:>9.1f} us")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""FileField workers benchmark, save() latency against a slow disk.
+
+The slow disk stand-in is a file object that sleeps on every read chunk,
+concurrent uploads come from several request threads at once.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_file_background.py"""
+
+
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from peewee import Model, SqliteDatabase
+
+from peewee_extra_fields import FileField
+
+
+THREADS, UPLOADS_PER_THREAD, SIZE, DELAY = 8, 10, 262_144, 0.002
+
+
+class SlowFile(io.BytesIO):
+    """BytesIO that sleeps DELAY seconds per read, like a slow disk."""
+
+    def read(self, size=-1):
+        time.sleep(DELAY)
+        return super().read(size if size and size > 0 else 65_536)
+
+
+def run(workers: int) -> tuple:
+    folder = tempfile.mkdtemp(prefix="bench_file_background_")
+    db = SqliteDatabase(os.path.join(folder, "bench.db"))  # 1 per thread.
+
+    class Upload(Model):
+        data = FileField(folder_for_files=os.path.join(folder, "files"),
+                         workers=workers)
+        class Meta:
+            database = db
+
+    db.create_tables([Upload])
+    lock, latencies = threading.Lock(), []
+
+    def request():
+        for _ in range(UPLOADS_PER_THREAD):
+            started = time.perf_counter()
+            with lock:  # SQLite has 1 writer, the copy is outside if workers.
+                Upload.create(data=SlowFile(b"x" * SIZE))
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=request) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        submitted = time.perf_counter() - started
+        Upload.data.flush()
+        total = time.perf_counter() - started
+        return statistics.median(latencies), max(latencies), submitted, total
+    finally:
+        if Upload.data.writer:
+            Upload.data.writer.shutdown()
+        shutil.rmtree(folder)
+
+
+def main():
+    print(f"{THREADS} threads x {UPLOADS_PER_THREAD} uploads of {SIZE:,} bytes, "
+          f"{DELAY * 1000:.0f} ms per 64 KiB read.")
+    for workers in (0, 4, 16):
+        median, worst, submitted, total = run(workers)
+        print(f"workers={workers:2}: save() median {median * 1000:7.2f} ms, "
+              f"max {worst * 1000:7.2f} ms, all saved {submitted:.2f} s, "
+              f"all on disk {total:.2f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""FileField storage="name" stress benchmark, many processes saving at once.
+
+Every process saves files with the same few names into the same folder,
+the old exists() then write() could overwrite, O_EXCL claims never do.
+Reports throughput and checks that no file was lost nor overwritten.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_file_writes.py"""
+
+
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from multiprocessing import Pool
+
+from peewee_extra_fields.files import store_by_name
+
+
+PROCESSES, FILES_PER_PROCESS, NAMES = 8, 250, 5
+
+
+def worker(arguments) -> list:
+    folder, fan_out, worker_id = arguments
+    paths = []
+    for i in range(FILES_PER_PROCESS):
+        content = f"{worker_id}:{i}:".encode() * 256
+        paths.append((store_by_name(io.BytesIO(content), folder,
+                                    f"upload_{i % NAMES}.bin", fan_out),
+                      content))
+    return paths
+
+
+def run(fan_out: int) -> tuple:
+    folder = tempfile.mkdtemp(prefix="bench_file_writes_")
+    try:
+        started = time.perf_counter()
+        with Pool(PROCESSES) as pool:
+            results = pool.map(worker, [(folder, fan_out, worker_id)
+                                        for worker_id in range(PROCESSES)])
+        elapsed = time.perf_counter() - started
+        saved = [item for result in results for item in result]
+        lost = sum(1 for path, content in saved
+                   if open(path, "rb").read() != content)
+        stored = sum(len(files) for _, _, files in os.walk(folder))
+        return elapsed, len(saved), len({path for path, _ in saved}), stored, lost
+    finally:
+        shutil.rmtree(folder)
+
+
+def main():
+    print(f"{PROCESSES} processes x {FILES_PER_PROCESS} files, {NAMES} names.")
+    for fan_out in (0, 1, 2):
+        elapsed, saved, paths, stored, lost = run(fan_out)
+        print(f"fan_out={fan_out}: {saved / elapsed:9,.0f} files/s, "
+              f"{saved} saved, {paths} unique paths, {stored} on disk, "
+              f"{lost} overwritten.")
+
+
+if __name__ == "__main__":
+    main()
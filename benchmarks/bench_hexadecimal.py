@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""HexadecimalField benchmark, 32 byte SHA-256 digests.
+
+"old" is the previous round trip, digest to hex str for the field, Regex
+and unhexlify() on write, hexlify().decode() on read, "new" passes the
+digests as they are and reads them as "hex", "bytes" or "lazy".
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_hexadecimal.py"""
+
+
+import binascii
+import hashlib
+import re
+import timeit
+
+from peewee_extra_fields import HexadecimalField
+
+
+VALUES = 100_000
+
+
+def old_db_value(value):
+    if not re.match(r"^(([0-9A-f])|(0x[0-9A-f]))+$", value):
+        raise ValueError(value)
+    return binascii.unhexlify(value)
+
+
+def main():
+    digests = [hashlib.sha256(str(i).encode()).digest() for i in range(VALUES)]
+    views = [memoryview(digest) for digest in digests]
+    hexes = [digest.hex() for digest in digests]
+    field = HexadecimalField()
+    as_bytes, lazy = HexadecimalField(output="bytes"), HexadecimalField(output="lazy")
+
+    cases = {
+        "write old, digest > hex > bytes": lambda: [
+            old_db_value(binascii.hexlify(digest).decode()) for digest in digests],
+        "write new, hex str": lambda: [field.db_value(value) for value in hexes],
+        "write new, digest": lambda: [field.db_value(value) for value in digests],
+        "read old, hexlify().decode()": lambda: [
+            binascii.hexlify(value).decode(encoding='UTF-8') for value in views],
+        "read new, hex": lambda: [field.python_value(value) for value in views],
+        "read new, bytes": lambda: [as_bytes.python_value(value) for value in views],
+        "read new, lazy": lambda: [lazy.python_value(value) for value in views],
+    }
+    print(f"{VALUES:,} digests from memoryview rows, best of 3.")
+    for name, function in cases.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=3))
+        print(f"{name:32}: {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""InternationalZipCodeField validation benchmark, multi-country addresses.
+
+"per class" looks up the XXZipCodeField class of each row and calls its
+db_value(), "db_value()" validates 1 row at a time on the dispatch table,
+"validate_many()" groups the rows by Country, 1 loop per compiled Regex.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_international_zip.py [rows]"""
+
+
+import random
+import sys
+import timeit
+
+from peewee_extra_fields import InternationalZipCodeField, regex_fields
+
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+SAMPLES = {"DE": "01067", "JP": "100-0001", "BR": "01001-000", "US": "12345",
+           "ES": "28001", "PL": "00-950", "SE": "114 55", "NZ": "6011"}
+
+
+def main():
+    rnd = random.Random(42)
+    rows = [rnd.choice(list(SAMPLES.items())) for _ in range(ROWS)]
+    fields = {country: getattr(regex_fields, f"{country}ZipCodeField", None)
+              for country in SAMPLES}
+    field = InternationalZipCodeField()
+
+    def per_class():
+        for country, postal_code in rows:
+            field_class = fields[country]
+            if field_class is not None:
+                field_class().db_value(postal_code)
+
+    def per_row():
+        for row in rows:
+            field.db_value(row)
+
+    cases = {"per class": per_class, "db_value()": per_row,
+             "validate_many()": lambda: field.validate_many(rows)}
+    assert all(field.validate_many(rows))
+    print(f"{ROWS:,} rows of {len(SAMPLES)} countries, best of 3.")
+    for name, function in cases.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=3))
+        print(f"{name:16}: {seconds * 1000:7.1f} ms, {ROWS / seconds:11,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
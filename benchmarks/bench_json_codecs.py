@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""JSONField codecs benchmark, throughput and allocations per codec.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_json_codecs.py"""
+
+
+import timeit
+import tracemalloc
+
+from peewee_extra_fields import JSON_CODECS, JSONField
+
+
+SMALL = {"id": 42, "name": "Zoe", "tags": ["python", "peewee"], "ok": True}
+LARGE = {"rows": [{"id": i, "name": f"user{i}", "score": i * 0.5,
+                   "tags": ["a", "b", "c"], "active": bool(i % 2)}
+                  for i in range(10_000)]}
+
+
+def allocations(function) -> tuple:
+    """Return (allocated blocks, peak bytes) of 1 call of function."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = function()  # Keep it alive so its blocks are counted.
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return blocks, peak
+
+
+def bench(codec: str, label: str, document, number: int) -> None:
+    field = JSONField(codec=codec, binary=True)
+    encoded = field.db_value(document)
+    raw = encoded if isinstance(encoded, bytes) else encoded.encode("utf-8")
+    for operation, function in (
+            ("encode", lambda: field.db_value(document)),
+            ("decode", lambda: field.python_value(encoded)),
+            ("decode bytes", lambda: field.python_value(raw)),
+            ("decode memoryview", lambda: field.python_value(memoryview(raw)))):
+        seconds = min(timeit.repeat(function, number=number, repeat=3))
+        blocks, peak = allocations(function)
+        print(f"{codec:<8} {label:<6} {operation:<18} "
+              f"{number / seconds:>14,.0f} ops/s "
+              f"{len(raw) * number / seconds / 1_048_576:>10,.1f} MiB/s "
+              f"{blocks:>8} blocks {peak:>12,} peak bytes")
+
+
+if __name__ in "__main__":
+    print(__doc__)
+    for codec in JSON_CODECS:
+        bench(codec, "small", SMALL, 100_000)
+        bench(codec, "large", LARGE, 10)
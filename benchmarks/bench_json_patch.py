@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""JSONField.patch() benchmark, bytes written by small changes to documents.
+
+Compares the full rewrite of each document against JSONField.patch(),
+reporting the bytes of SQL parameters sent and the SQLite WAL growth.
+SQLite rewrites the whole row anyway, so WAL is similar, sent bytes are not.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_json_patch.py"""
+
+
+import argparse
+import os
+import tempfile
+import time
+
+from peewee import Model, SqliteDatabase
+
+from peewee_extra_fields import JSONField
+
+
+db = SqliteDatabase(None, pragmas={"journal_mode": "wal"})
+
+
+class Event(Model):
+    payload = JSONField()
+
+    class Meta:
+        database = db
+
+
+def sent_bytes(query) -> int:
+    sql, params = query.sql()
+    return len(sql) + sum(len(str(param)) for param in params)
+
+
+def run(label: str, rows: int, kb: int, use_patch: bool) -> None:
+    document = {"status": "new", "counter": 0,
+                "items": [{"id": i, "text": "x" * 1_000} for i in range(kb)]}
+    Event.delete().execute()
+    Event.insert_many([(document, )] * rows, fields=[Event.payload]).execute()
+    db.execute_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    wal, total, started = db.database + "-wal", 0, time.perf_counter()
+    with db.atomic():
+        for pk in range(1, rows + 1):
+            new = dict(document, status="done", counter=pk)
+            if use_patch:
+                changes, remove = JSONField.diff(document, new)
+                value = Event.payload.patch(changes, remove, document=new)
+            else:
+                value = new
+            query = Event.update({Event.payload: value}).where(Event.id == pk)
+            total += sent_bytes(query)
+            query.execute()
+    seconds = time.perf_counter() - started
+    print(f"{label:<14} {seconds:>8.3f} s {total:>14,} bytes sent "
+          f"{os.path.getsize(wal):>14,} bytes WAL")
+
+
+if __name__ in "__main__":
+    print(__doc__)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--kb", type=int, default=10)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as folder:
+        db.init(os.path.join(folder, "bench.db"))
+        db.create_tables([Event])
+        run("full rewrite", args.rows, args.kb, use_patch=False)
+        run("patch()", args.rows, args.kb, use_patch=True)
+        db.close()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""JSONField.path() push-down benchmark, 1 scalar from big JSON documents.
+
+Compares select() of the whole document decoded in Python against
+select() of JSONField.path() extracted by the database (SQLite on disk).
+Defaults are 100k rows of 100 KB (~10 GB of disk), use --rows and --kb.
+SQLite json_extract() still parses the JSON text, the win there is less data
+transferred and decoded in Python, on PostgreSQL jsonb it is not reparsed.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_json_path.py"""
+
+
+import argparse
+import os
+import tempfile
+import time
+
+from peewee import Model, SqliteDatabase
+
+from peewee_extra_fields import JSONField
+
+
+db = SqliteDatabase(None)
+
+
+class Event(Model):
+    payload = JSONField(validate=None)
+
+    class Meta:
+        database = db
+
+
+def populate(rows: int, kb: int) -> None:
+    padding = "x" * 1_000
+    filler = ",".join(f'"k{i}":"{padding}"' for i in range(kb))
+    with db.atomic():
+        for start in range(0, rows, 1_000):
+            Event.insert_many(
+                [(f'{{"a":{{"b":[{i},"x"]}},{filler}}}',)
+                 for i in range(start, min(start + 1_000, rows))],
+                fields=[Event.payload]).execute()
+
+
+def timed(label: str, rows: int, function) -> None:
+    started = time.perf_counter()
+    total = function()
+    seconds = time.perf_counter() - started
+    print(f"{label:<28} {seconds:>9.3f} s {rows / seconds:>12,.0f} rows/s "
+          f"checksum={total}")
+
+
+if __name__ in "__main__":
+    print(__doc__)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--kb", type=int, default=100)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as folder:
+        db.init(os.path.join(folder, "bench.db"))
+        db.create_tables([Event])
+        populate(args.rows, args.kb)
+        timed("whole document + loads", args.rows, lambda: sum(
+            payload["a"]["b"][0] for payload, in
+            Event.select(Event.payload).tuples().iterator()))
+        timed("path('a', 'b', 0) push-down", args.rows, lambda: sum(
+            value for value, in Event.select(
+                Event.payload.path("a", "b", 0)).tuples().iterator()))
+        db.close()
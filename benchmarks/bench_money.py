@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""MoneyField(minor_units=2) aggregation benchmark on SQLite.
+
+"minor units" sums BIGINT cents in SQL, "DecimalField" sums in SQL too but
+SQLite stores it as REAL, so the total is not exact. SQLite has no money
+type, "money text" stands in for it: the driver returns "$1,234.56" text
+that is parsed in Python, like psycopg does with the money type.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_money.py"""
+
+
+import random
+import timeit
+
+from decimal import Decimal
+
+from peewee import DecimalField, Model, SqliteDatabase, TextField, fn
+
+from peewee_extra_fields import FIELD_TYPES, MoneyField
+
+
+ROWS = 200_000
+
+
+def main():
+    db = SqliteDatabase(":memory:", field_types=FIELD_TYPES)
+
+    class Sale(Model):
+        cents = MoneyField(minor_units=2)
+        decimal = DecimalField(decimal_places=2, auto_round=True)
+        money = TextField()
+        class Meta:
+            database = db
+
+    db.create_tables([Sale])
+    rnd = random.Random(42)
+    amounts = [Decimal(rnd.randint(1, 10 ** 8)).scaleb(-2) for _ in range(ROWS)]
+    with db.atomic():
+        for offset in range(0, ROWS, 10_000):
+            Sale.insert_many(
+                [(amount, amount, f"${amount:,}")
+                 for amount in amounts[offset:offset + 10_000]],
+                fields=[Sale.cents, Sale.decimal, Sale.money]).execute()
+    exact = sum(amounts)
+
+    def money_text():
+        return sum(Decimal(value.replace("$", "").replace(",", ""))
+                   for value in Sale.select(Sale.money).scalars())
+
+    cases = {
+        "minor units SUM()": lambda: Sale.select(Sale.cents.sum()).scalar(),
+        "minor units AVG()": lambda: Sale.select(Sale.cents.avg()).scalar(),
+        "DecimalField SUM()": lambda: Sale.select(fn.SUM(Sale.decimal).coerce(
+            True)).scalar(),  # Decimal from a REAL total.
+        "money text parsed": money_text,
+    }
+    print(f"{ROWS:,} rows, exact total {exact}.")
+    for name, function in cases.items():
+        seconds = min(timeit.repeat(function, number=1, repeat=3))
+        result = function()
+        print(f"{name:20}: {ROWS / seconds:13,.0f} rows/s, {result} "
+              f"{'exact' if result == exact else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""PastDateTimeField db_value() benchmark, bulk loads of past dates.
+
+"old" is the previous loop, strptime() on every format until 1 matches
+and utcnow() on every row, "new" is fromisoformat(), the remembered
+format, the cached "now" and db_values() for epoch ints and NumPy.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_past_dates.py"""
+
+
+import random
+import timeit
+
+from datetime import datetime, timedelta
+
+from peewee_extra_fields import PastDateTimeField
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ROWS = 20_000
+
+
+def old_db_value(formats, value):
+    for datetime_format in formats:
+        try:
+            valid_datetime = datetime.strptime(value, datetime_format)
+        except Exception:
+            pass
+        else:
+            break
+    if valid_datetime > datetime.utcnow():
+        raise ValueError(value)
+    return value
+
+
+def main():
+    rnd = random.Random(42)
+    moments = [datetime(2000, 1, 1) + timedelta(seconds=rnd.randint(0, 7 * 10 ** 8))
+               for _ in range(ROWS)]
+    iso = [moment.isoformat(" ") for moment in moments]
+    custom = [moment.strftime("%d/%m/%Y %H:%M") for moment in moments]
+    epochs = [int((moment - datetime(1970, 1, 1)).total_seconds()) for moment in moments]
+    formats = PastDateTimeField().formats
+    custom_formats = [*formats, "%d/%m/%Y %H:%M"]
+
+    cases = {
+        "ISO strings": (lambda: [old_db_value(formats, value) for value in iso],
+                        lambda: PastDateTimeField().db_values(iso)),
+        "custom format strings": (
+            lambda: [old_db_value(custom_formats, value) for value in custom],
+            lambda: PastDateTimeField(formats=custom_formats).db_values(custom)),
+        "epoch ints": (None, lambda: PastDateTimeField().db_values(epochs)),
+    }
+    if numpy:
+        array = numpy.array(epochs, dtype="datetime64[s]")
+        cases["NumPy datetime64"] = (
+            None, lambda: PastDateTimeField().db_values(array))
+
+    print(f"{ROWS:,} rows, best of 3.")
+    for name, (old, new) in cases.items():
+        new_time = min(timeit.repeat(new, number=1, repeat=3))
+        if old:
+            old_time = min(timeit.repeat(old, number=1, repeat=3))
+            print(f"{name:24}: old {old_time * 1000:8.1f} ms, "
+                  f"new {new_time * 1000:8.1f} ms, x{old_time / new_time:.1f}")
+        else:
+            print(f"{name:24}: new {new_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""RegexFieldClassifier benchmark, profiling a column of unknown values.
+
+"old" runs db_value() of every _BaseRegexField class on each value and
+catches ValueError, "new" is 1 match() of the combined Regex per value,
+"new, repeated" is a realistic column where values repeat (cached).
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_regex_classifier.py [rows]"""
+
+
+import random
+import sys
+import timeit
+
+from peewee_extra_fields import RegexFieldClassifier
+
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def old_classify(field_classes, value):
+    classes = set()
+    for field_class in field_classes:
+        try:
+            field_class().db_value(value)
+        except ValueError:
+            pass
+        else:
+            classes.add(field_class)
+    return classes
+
+
+def main():
+    rnd = random.Random(42)
+    unique = [rnd.choice((f"{i:05d}", f"{i % 1000:03d}-{i:04d}", f"{i:05d}-{i % 999:03d}",
+                          f"1.{i % 50}.{i % 7}", f"RO{i}", f"id-{i}"))
+              for i in range(ROWS)]
+    repeated = [rnd.choice(unique[:1_000]) for _ in range(ROWS)]
+    classifier = RegexFieldClassifier()
+    fields = classifier.field_classes
+
+    print(f"{ROWS:,} values, {len(fields)} field classes, best of 3.")
+    sample = unique[:ROWS // 10]
+    old = min(timeit.repeat(lambda: [old_classify(fields, value) for value in sample],
+                            number=1, repeat=3)) * 10
+    print(f"{'old, db_value() x classes':26}: {old * 1000:9.1f} ms (from 1/10 of the rows)")
+    for name, values, cache in (("new", unique, 0), ("new, repeated", repeated, 65_536)):
+        def run():
+            return RegexFieldClassifier(cache_size=cache).classify_many(values)
+        seconds = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:26}: {seconds * 1000:9.1f} ms, x{old / seconds:.0f}")
+    report = classifier.report(unique)
+    print("Suggestions:", report["suggestions"][:4], "unmatched", report["unmatched"])
+
+
+if __name__ == "__main__":
+    main()
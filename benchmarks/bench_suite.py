@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Benchmark suite of every class in __all__, on in-memory SQLite.
+
+Per Field class: seconds per db_value() and python_value() call, seconds
+per row of insert_many() and of select() hydration, plus the import time.
+The other classes of __all__ have 1 per call case each, or are listed as
+skipped with the reason, a Field class without a sample is an error.
+
+Each case is the median of REPEAT runs. Results are saved as JSON,
+--baseline compares them against a stored baseline and exits with 1 when
+a case is sustained slower than --tolerance times the baseline (the slow
+cases are measured again on a new process and must be slow on both runs,
+sub-microsecond cases get NOISE seconds of slack), or when the geometric
+mean of all the cases is over --aggregate-tolerance. 1 case swings up to
+x1.7 from 1 run to the next with the same code on a shared machine, the
+geometric mean of all of them about 5%, hence the defaults.
+Times are compared divided by a calibration loop measured right before
+and after each class, so a shared machine that is slower for a few
+minutes, or a baseline from another machine, compare roughly the same.
+
+Run from the repo root:
+    PYTHONPATH=. python3 benchmarks/bench_suite.py --output results.json
+    PYTHONPATH=. python3 benchmarks/bench_suite.py --baseline benchmarks/baseline.json
+    PYTHONPATH=. python3 benchmarks/bench_suite.py --only ZipCode --baseline ...
+Refresh the baseline after an intended change, on the reference machine:
+    PYTHONPATH=. python3 benchmarks/bench_suite.py --output benchmarks/baseline.json"""
+
+
+import argparse
+import json
+import os
+import platform
+import math
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum, Flag
+
+import peewee
+
+from peewee import Model, SqliteDatabase
+
+import peewee_extra_fields
+
+from peewee_extra_fields import (FIELD_TYPES, Compressor, DateTimeTZRange,
+                                 HexBytes, MappedWordList, RegexFieldClassifier)
+
+
+ROWS = 2_000
+REPEAT = 5
+NOISE = 50e-9  # Seconds, timer and interpreter jitter of sub-microsecond cases.
+Color = Enum("Color", {"RED": 1, "GREEN": 2})
+Permission = Flag("Permission", {"READ": 1, "WRITE": 2})
+FOLDER = tempfile.mkdtemp()
+SAMPLE_FILE = os.path.join(FOLDER, "sample.txt")
+UTC = timezone.utc
+
+# Field class name: (keyword arguments, valid sample value).
+SAMPLES = {
+    "ARCUITField": ({}, "20-30999666-6"),
+    "ARZipCodeField": ({}, "2804"),
+    "ATZipCodeField": ({}, "1010"),
+    "AUZipCodeField": ({}, "2000"),
+    "BEZipCodeField": ({}, "1000"),
+    "BRZipCodeField": ({}, "01001-000"),
+    "CHZipCodeField": ({}, "8001"),
+    "CLRutField": ({}, "12.345.678-5"),
+    "CNZipCodeField": ({}, "100000"),
+    "CONITField": ({}, "800197268-4"),
+    "CSVField": ({}, "peewee,extra,fields"),
+    "CUZipCodeField": ({}, "10400"),
+    "CZZipCodeField": ({}, "110 00"),
+    "CharFieldCustom": ({"use_lower": True, "force_slugify": True}, "Peewee ORM"),
+    "ColorHexadecimalField": ({}, "#bebebe"),
+    "CountryISOCodeField": ({}, "ar"),
+    "CurrencyISOCodeField": ({}, "usd"),
+    "DEZipCodeField": ({}, "01067"),
+    "DateTimeTZRangeField": ({}, (datetime(2020, 1, 1, tzinfo=UTC),
+                                  datetime(2020, 1, 2, tzinfo=UTC))),
+    "EEZipCodeField": ({}, "10111"),
+    "ESZipCodeField": ({}, "28001"),
+    "EmailField": ({}, "user@example.com"),
+    "EnumField": ({"enum": Color}, Color.RED),
+    "FileField": ({"folder_for_files": FOLDER, "storage": "sha256"}, SAMPLE_FILE),
+    "FlagField": ({"enum": Permission}, Permission.READ | Permission.WRITE),
+    "GRZipCodeField": ({}, "10431"),
+    "HROIBField": ({}, "12345678901"),
+    "HexadecimalField": ({}, "deadbeef"),
+    "IANCodeField": ({}, "5901234123457"),
+    "IBANISOCodeField": ({}, "DE44 5001 0517 5407 3249 31"),
+    "ILZipCodeField": ({}, "6100000"),
+    "INZipCodeField": ({}, "110001"),
+    "IPAddressField": ({}, "192.168.0.1"),
+    "IPNetworkField": ({}, "192.0.0.0/10"),
+    "ISIdNumberField": ({}, "120174-3399"),
+    "InternationalZipCodeField": ({}, ("DE", "01067")),
+    "JPZipCodeField": ({}, "100-0001"),
+    "JSONField": ({}, {"a": [1, 2, 3], "b": {"c": "d"}}),
+    "LanguageISOCodeField": ({}, "en"),
+    "MKIdentityCardNumberField": ({}, "A1234567"),
+    "MTZipCodeField": ({}, "VLT 1117"),
+    "MXZipCodeField": ({}, "06000"),
+    "MoneyField": ({"minor_units": 2}, Decimal("1024.75")),
+    "PLNIPField": ({}, "1234567890"),
+    "PLNationalIDCardNumberField": ({}, "ABC123456"),
+    "PLZipCodeField": ({}, "00-950"),
+    "PTZipCodeField": ({}, "1000-001"),
+    "PasswordField": ({}, "correct horse battery staple"),
+    "PastDateField": ({}, "2000-01-01"),
+    "PastDateTimeField": ({}, "2000-01-01 10:00:00"),
+    "PositiveBigIntegerField": ({}, 9_000_000_000),
+    "PositiveDecimalField": ({}, Decimal("4.2")),
+    "PositiveFloatField": ({}, 4.2),
+    "PositiveIntegerField": ({}, 42),
+    "PositiveSmallIntegerField": ({}, 42),
+    "ROCIFField": ({}, "RO1234567"),
+    "ROCNPField": ({}, "1234567890123"),
+    "ROZipCodeField": ({}, "010011"),
+    "RUPassportNumberField": ({}, "1234 567890"),
+    "SEZipCodeField": ({}, "114 55"),
+    "SKZipCodeField": ({}, "811 01"),
+    "SWIFTISOCodeField": ({}, "DEUTDEFF"),
+    "SemVerField": ({}, "1.2.3"),
+    "SimplePasswordField": ({"salt": "benchmark", "iterations": 1_000},  # Not PBKDF2.
+                            "correct horse battery staple"),
+    "SmallHexadecimalField": ({}, "ff"),
+    "TextField": ({}, "Lorem ipsum dolor sit amet."),
+    "UAZipCodeField": ({}, "01001"),
+    "USSocialSecurityNumberField": ({}, "205-21-9000"),
+    "USZipCodeField": ({}, "20521-9000"),
+    "UYCIField": ({}, "1.234.567-2"),
+    "XMLField": ({}, "<a><b>foo</b><c x='1'/></a>"),
+}
+
+# Names of __all__ that are values or functions covered by other cases.
+NOT_BENCHMARKED = {
+    "FIELD_TYPES": "dict, not a class",
+    "JSON_CODECS": "dict, covered by JSONField",
+    "set_json_codec": "function, covered by JSONField",
+    "sweep_orphans": "function, see bench_sweep.py",
+    "FileReference": "value type, covered by FileField",
+    "InternationalZipCode": "value type, covered by InternationalZipCodeField",
+    "XMLString": "value type, covered by XMLField",
+}
+
+
+def extra_cases() -> dict:
+    """Per call cases of the classes of __all__ that are not Fields."""
+    words = MappedWordList.write(os.path.join(FOLDER, "words.txt"),
+                                 [f"word{i}" for i in range(10_000)])
+    compressor, data = Compressor(), b"peewee extra fields " * 50
+    compressed, words = compressor.compress(data), MappedWordList(words)
+    classifier, hex_bytes = RegexFieldClassifier(cache_size=0), HexBytes(b"\xde\xad")
+    return {
+        "Compressor": {"compress": lambda: compressor.compress(data),
+                       "decompress": lambda: compressor.decompress(compressed)},
+        "DateTimeTZRange": {"parse": lambda: DateTimeTZRange.parse(
+            '["2020-01-01 00:00:00+00:00","2020-01-02 00:00:00+00:00")')},
+        "HexBytes": {"str": lambda: str(hex_bytes)},
+        "MappedWordList": {"contains": lambda: "word5000" in words},
+        "RegexFieldClassifier": {"classify": lambda: classifier.classify("01067")},
+    }
+
+
+def per_call(function) -> float:
+    """Return the median seconds per call of function, REPEAT runs of ~50 ms."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()  # Calls for 0.2 seconds.
+    number = max(number // 4, 1)
+    return statistics.median(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def calibrate() -> float:
+    """Return the median seconds of a fixed loop, the speed of the machine now."""
+    return statistics.median(timeit.repeat(
+        "sum(range(10_000))", number=20, repeat=REPEAT)) / 20
+
+
+def per_row(function) -> float:
+    """Return the median seconds per row of function, REPEAT runs of ROWS."""
+    return statistics.median(timeit.repeat(
+        function, number=1, repeat=REPEAT)) / ROWS
+
+
+def bench_field(name: str, field_class, kwargs: dict, value) -> dict:
+    field = field_class(**kwargs)
+    db_value = field.db_value(value)
+    result = {"db_value": per_call(lambda: field.db_value(value)),
+              "python_value": per_call(lambda: field.python_value(db_value))}
+
+    db = SqliteDatabase(":memory:", field_types=FIELD_TYPES)
+
+    class Row(Model):
+        value = field_class(**kwargs)
+        class Meta:
+            database = db
+            table_name = name.lower()
+
+    db.create_tables([Row])
+    rows = [Row(value=value).__data__] * ROWS
+
+    def insert():
+        with db.atomic():
+            Row.delete().execute()
+            for offset in range(0, ROWS, 500):  # SQLite variables limit.
+                Row.insert_many(rows[offset:offset + 500]).execute()
+
+    result["insert_row"] = per_row(insert)
+    result["select_row"] = per_row(lambda: list(Row.select()))
+    db.close()
+    return result
+
+
+def import_seconds() -> float:
+    """Return the best seconds to import peewee_extra_fields, peewee excluded."""
+    code = ("import time, peewee; started = time.perf_counter(); "
+            "import peewee_extra_fields; print(time.perf_counter() - started)")
+    return min(float(subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True,
+        text=True).stdout) for _ in range(5))
+
+
+def run(only: str=None) -> dict:
+    with open(SAMPLE_FILE, "w") as file_object:
+        file_object.write("peewee extra fields\n" * 100)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "peewee": peewee.__version__,
+            "version": peewee_extra_fields.__version__,
+            "rows": ROWS,
+            "date": datetime.now(UTC).isoformat(timespec="seconds"),
+            "calibration": calibrate(),
+        },
+        "import": {"peewee_extra_fields": import_seconds()},
+        "fields": {}, "classes": {}, "skipped": {}, "calibration": {},
+    }
+    extras = extra_cases()
+    for name in peewee_extra_fields.__all__:
+        obj = getattr(peewee_extra_fields, name)
+        if only and not re.search(only, name):
+            continue
+        before = calibrate()
+        if name in NOT_BENCHMARKED:
+            results["skipped"][name] = NOT_BENCHMARKED[name]
+        elif name in extras:
+            results["classes"][name] = {case: per_call(function)
+                                        for case, function in extras[name].items()}
+            results["calibration"][name] = (before + calibrate()) / 2
+            print(f"{name:30}" + "".join(
+                f" {case} {seconds * 1e6:8.2f} us"
+                for case, seconds in results["classes"][name].items()))
+        elif obj is None:  # Optional dependency not installed.
+            results["skipped"][name] = "optional dependency not installed"
+        elif name not in SAMPLES:
+            raise KeyError(f"{name} is in __all__ but has no benchmark sample.")
+        else:
+            kwargs, value = SAMPLES[name]
+            results["fields"][name] = bench_field(name, obj, kwargs, value)
+            results["calibration"][name] = (before + calibrate()) / 2
+            print(f"{name:30}" + "".join(
+                f" {case} {seconds * 1e6:8.2f} us"
+                for case, seconds in results["fields"][name].items()))
+    return results
+
+
+def run_again(only: str) -> dict:
+    """Return run(only) from a new process, the allocator and caches of
+    this one keep some cases slow or fast for the whole process."""
+    output = os.path.join(FOLDER, "again.json")
+    subprocess.run([sys.executable, __file__, "--only", only, "--output",
+                    output], check=True, stdout=subprocess.DEVNULL)
+    with open(output) as file_object:
+        return json.load(file_object)
+
+
+def ratios(results: dict, baseline: dict) -> dict:
+    """Return {case: calibrated time / baseline time} of the common cases."""
+    calibration = baseline["meta"]["calibration"], results["meta"]["calibration"]
+    ratios = {}
+    for group in ("import", "fields", "classes"):
+        for name, cases in results[group].items():
+            scale = (baseline.get("calibration", {}).get(name, calibration[0]) /
+                     results.get("calibration", {}).get(name, calibration[1]))
+            cases = cases if isinstance(cases, dict) else {"seconds": cases}
+            base_cases = baseline[group].get(name)
+            if base_cases is None:
+                continue
+            if not isinstance(base_cases, dict):
+                base_cases = {"seconds": base_cases}
+            for case, seconds in cases.items():
+                if case in base_cases and base_cases[case] > 0:
+                    ratios[(group, name, case)] = (
+                        (seconds * scale + NOISE) / (base_cases[case] + NOISE))
+    return ratios
+
+
+def compare(results: dict, baseline: dict, tolerance: float,
+            again: dict=None) -> list:
+    """Return the cases slower than tolerance times the baseline.
+
+    With again (the results of a 2nd run) a case must be slow on both."""
+    slow = {case: ratio for case, ratio in ratios(results, baseline).items()
+            if ratio > tolerance}
+    if again is not None:
+        second = ratios(again, baseline)
+        slow = {case: min(ratio, second.get(case, ratio))
+                for case, ratio in slow.items()}
+        slow = {case: ratio for case, ratio in slow.items() if ratio > tolerance}
+    return [(".".join(case), ratio) for case, ratio in slow.items()]
+
+
+def geometric_mean(results: dict, baseline: dict) -> float:
+    """Return the geometric mean of all the ratios, 1.0 is no change."""
+    values = list(ratios(results, baseline).values())
+    return math.exp(sum(map(math.log, values)) / len(values)) if values else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Save the results as JSON to this path.")
+    parser.add_argument("--baseline", help="Compare against this results JSON.")
+    parser.add_argument("--only", help="Only the names matching this Regex.")
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="Sustained slowdown ratio of 1 case that fails the gate (2.0).")
+    parser.add_argument("--aggregate-tolerance", type=float, default=1.15,
+                        help="Slowdown ratio of the geometric mean of all the cases that fails the gate (1.15).")
+    args = parser.parse_args()
+
+    results = run(args.only)
+    print(f"Import peewee_extra_fields: {results['import']['peewee_extra_fields'] * 1000:.1f} ms, "
+          f"skipped: {', '.join(results['skipped'])}.")
+    if args.output:
+        with open(args.output, "w") as file_object:
+            json.dump(results, file_object, indent=2, sort_keys=True)
+            file_object.write("\n")
+    if args.baseline:
+        with open(args.baseline) as file_object:
+            baseline = json.load(file_object)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:  # Measure the slow ones again, noise is not sustained.
+            names = {case.split(".")[1] for case, _ in regressions}
+            print(f"Measuring again: {', '.join(sorted(names))}.")
+            again = run_again("^(" + "|".join(map(re.escape, names)) + ")$")
+            regressions = compare(results, baseline, args.tolerance, again)
+        for case, ratio in sorted(regressions, key=lambda item: -item[1]):
+            print(f"REGRESSION {case}: x{ratio:.2f} slower than the baseline.")
+        mean = geometric_mean(results, baseline)
+        print(f"Geometric mean of all the cases: x{mean:.3f} of the baseline.")
+        if mean > args.aggregate_tolerance:
+            print(f"REGRESSION all the cases: x{mean:.3f} slower than the baseline.")
+        if regressions or mean > args.aggregate_tolerance:
+            sys.exit(1)
+        print(f"No regressions over x{args.tolerance} (all the cases "
+              f"x{args.aggregate_tolerance}) of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
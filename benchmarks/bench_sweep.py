@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""sweep_orphans() throughput and peak memory on many small files.
+
+Half of the files are referenced by rows, the other half are orphans,
+a small run_size keeps the peak memory flat as the file count grows.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_sweep.py"""
+
+
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+from peewee import Model, SqliteDatabase
+
+from peewee_extra_fields import FileField, FileReference, sweep_orphans
+
+
+def run(files: int, run_size: int) -> tuple:
+    folder = tempfile.mkdtemp(prefix="bench_sweep_")
+    db = SqliteDatabase(":memory:")
+
+    class Attachment(Model):
+        data = FileField(folder_for_files=folder)
+        class Meta:
+            database = db
+
+    db.create_tables([Attachment])
+    try:
+        for i in range(files):
+            path = os.path.join(folder, f"{i % 256:02x}", f"file_{i}.bin")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+        with db.atomic():  # FileReference is not copied again.
+            Attachment.insert_many(
+                [(FileReference(os.path.join(folder, f"{i % 256:02x}",
+                                             f"file_{i}.bin")), )
+                 for i in range(0, files, 2)],
+                fields=[Attachment.data]).execute()
+        tracemalloc.start()
+        report = sweep_orphans([Attachment.data], min_age=0, run_size=run_size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return report, peak
+    finally:
+        shutil.rmtree(folder)
+
+
+def main():
+    for files in (20_000, 80_000):
+        for run_size in (5_000, 100_000):
+            report, peak = run(files, run_size)
+            print(f"{files:7,} files, run_size={run_size:7,}: "
+                  f"{report['files_per_second']:9,.0f} files/s, "
+                  f"{report['orphans']:,} orphans, peak {peak / 2 ** 20:6.1f} MiB.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""TextField validators benchmark, allowlists from 10 to 100_000 strings.
+
+"old" is the previous loop, == against every str validator until 1 is
+equal, "new" is the frozenset compiled on __init__ and the bulk API.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_text_validators.py"""
+
+
+import random
+import timeit
+
+from peewee_extra_fields import TextField
+
+
+VALUES = 2_000
+
+
+def old_run_validators(validators, value):
+    for validator in validators:
+        if isinstance(validator, str):
+            result = value == validator
+        else:
+            result = validator(value)
+        if result:
+            break
+    else:
+        result = False
+    return result
+
+
+def main():
+    rnd = random.Random(42)
+    print(f"{VALUES:,} values, half allowed, best of 3.")
+    for size in (10, 1_000, 10_000, 100_000):
+        allowlist = [f"user-{i:06d}" for i in range(size)]
+        values = [rnd.choice(allowlist) if i % 2 else f"guest-{i}"
+                  for i in range(VALUES)]
+        field = TextField(validators=allowlist)
+        old = min(timeit.repeat(
+            lambda: [old_run_validators(allowlist, value) for value in values],
+            number=1, repeat=3))
+        new = min(timeit.repeat(
+            lambda: [field.run_validators(value) for value in values],
+            number=1, repeat=3))
+        bulk = min(timeit.repeat(lambda: field.run_validators_many(values),
+                                 number=1, repeat=3))
+        print(f"{size:7,} strings: old {old * 1000:9.2f} ms, new "
+              f"{new * 1000:6.2f} ms, bulk {bulk * 1000:6.2f} ms, "
+              f"x{old / new:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
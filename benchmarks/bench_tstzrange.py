@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""DateTimeTZRangeField booking conflict benchmark on SQLite 2 columns.
+
+Every booking is 30 minutes to 4 hours on 1 of 100 rooms, the query asks
+for the bookings of 1 room that overlap a new booking. max_duration turns
+the scan of lower bounds into a bounded index range scan.
+PostgreSQL uses && on a GiST index instead, not measured here.
+
+Run from the repo root: PYTHONPATH=. python3 benchmarks/bench_tstzrange.py [rows]"""
+
+
+import random
+import sys
+import time
+import timeit
+
+from datetime import datetime, timedelta, timezone
+
+from peewee import IntegerField, Model, SqliteDatabase
+
+from peewee_extra_fields import FIELD_TYPES, DateTimeTZRangeField
+
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+START, QUERIES = datetime(2020, 1, 1, tzinfo=timezone.utc), 1_000
+
+
+def main():
+    db = SqliteDatabase(":memory:", field_types=FIELD_TYPES)
+
+    class Booking(Model):
+        room = IntegerField()
+        period = DateTimeTZRangeField(max_duration=timedelta(hours=4))
+        class Meta:
+            database = db
+
+    db.create_tables([Booking])
+    rnd, started = random.Random(42), time.perf_counter()
+    with db.atomic():
+        for offset in range(0, ROWS, 10_000):
+            rows = []
+            for _ in range(min(10_000, ROWS - offset)):
+                lower = START + timedelta(minutes=rnd.randint(0, 5 * 365 * 24 * 60))
+                booking = Booking(room=rnd.randint(1, 100), period=(
+                    lower, lower + timedelta(minutes=rnd.randint(30, 240))))
+                rows.append(booking.__data__)
+            Booking.insert_many(rows).execute()
+    print(f"{ROWS:,} bookings inserted in {time.perf_counter() - started:.1f} s.")
+
+    probes = []
+    for _ in range(QUERIES):
+        lower = START + timedelta(minutes=rnd.randint(0, 5 * 365 * 24 * 60))
+        probes.append((rnd.randint(1, 100), (lower, lower + timedelta(hours=2))))
+
+    def conflicts(bounded: bool):
+        Booking.period.max_duration = timedelta(hours=4) if bounded else None
+        return sum(Booking.select().where(
+            (Booking.room == room) & Booking.period.overlaps(period)).count()
+            for room, period in probes)
+
+    Booking.add_index(Booking.room, Booking.period, Booking.period_upper)
+    cases = [("no index", False, False), ("index", True, False),
+             ("index + max_duration", True, True)]
+    for name, indexed, bounded in cases:
+        if indexed:
+            db.create_tables([Booking])  # Creates the missing index.
+        found = conflicts(bounded)
+        seconds = min(timeit.repeat(lambda: conflicts(bounded), number=1, repeat=3))
+        print(f"{name:22}: {seconds / QUERIES * 1e6:9.1f} us per conflict "
+              f"query, {found} conflicts.")
+    query = Booking.select().where(
+        (Booking.room == 1) & Booking.period.overlaps(probes[0][1]))
+    sql, params = query.sql()
+    print("Plan:", db.execute_sql("EXPLAIN QUERY PLAN " + sql, params).fetchall()[-1][-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -10,24 +10,39 @@ import binascii
 import codecs
 import hashlib
 import io
+import json
+import operator
 import os
 import re
 import secrets
-import shutil
 import string
 import struct
+import time
+import unicodedata
 import xml.etree.ElementTree as ET
+import xml.parsers.expat as expat
 
 try:
-    import ujson as json
+    import orjson
 except ImportError:
-    import json
+    orjson = None
 
-from collections import namedtuple
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from collections import defaultdict, namedtuple
 from colorsys import rgb_to_hls, rgb_to_hsv, rgb_to_yiq
-from datetime import date, datetime
-from decimal import Decimal
-from enum import Enum
+from datetime import date, datetime, timedelta, timezone
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from enum import Enum, Flag
+from functools import cached_property, partial, reduce
 from ipaddress import IPv4Address, IPv4Network, ip_address, ip_network
 from json import loads
 from pathlib import Path
@@ -35,11 +50,20 @@ from random import choice
 from types import MappingProxyType as frozendict
 from urllib.parse import urlencode
 
-from peewee import (BigIntegerField, BlobField, CharField, DateField,
-                    DateTimeField, DecimalField, Field, FixedCharField,
-                    FloatField, IntegerField, SmallIntegerField, TextField)
-
-from . import exceptions
+from peewee import (SCOPE_SOURCE, BigIntegerField, BlobField, Case, Cast,
+                    CharField, ColumnBase, DateField, DateTimeField,
+                    DecimalField, Expression, Field, FieldAccessor,
+                    FixedCharField, FloatField, IntegerField, NodeList, OP,
+                    PostgresqlDatabase, SmallIntegerField, SQL, TextField,
+                    Value, __sqlite_version__, fn)
+
+from . import exceptions, regex_fields
+from .compression import Compressor
+from .files import (BackgroundWriter, FileReference, content_address_path,
+                    fill_path, reserve_by_name, store_by_name,
+                    store_content_addressed)
+from .matching import MappedWordList, WordMatcher
+from .sweep import sweep_orphans
 from .regex_fields import *
 from .legacy_fields import *
 from .ar_fields import *
@@ -54,7 +78,7 @@ __all__ = (
     'CZZipCodeField', 'CharFieldCustom', 'ColorHexadecimalField',
     'CountryISOCodeField', 'CurrencyISOCodeField', 'DEZipCodeField',
     'DateTimeTZRangeField', 'EEZipCodeField', 'ESZipCodeField', 'EmailField',
-    'FIELD_TYPES', 'GRZipCodeField', 'HROIBField',  # 'EnumField',
+    'FIELD_TYPES', 'GRZipCodeField', 'HROIBField', 'EnumField', 'FlagField',
     'HexadecimalField', 'IANCodeField', 'IBANISOCodeField', 'ILZipCodeField',
     'INZipCodeField', 'IPAddressField', 'IPNetworkField', 'ISIdNumberField',
     'JPZipCodeField', 'LanguageISOCodeField', 'MKIdentityCardNumberField',
@@ -67,14 +91,19 @@ __all__ = (
     'SKZipCodeField', 'SWIFTISOCodeField', 'SemVerField',
     'SimplePasswordField', 'SmallHexadecimalField', 'UAZipCodeField',
     'USSocialSecurityNumberField', 'USZipCodeField', 'UYCIField', 'XMLField',
-    'JSONField', 'FileField', 'TextField',
+    'JSONField', 'FileField', 'TextField', 'JSON_CODECS', 'set_json_codec',
+    'Compressor', 'XMLString', 'FileReference', 'sweep_orphans',
+    'DateTimeTZRange', 'MappedWordList', 'HexBytes',
+    'InternationalZipCodeField', 'InternationalZipCode',
+    'RegexFieldClassifier',
 )
 
 
 ##############################################################################
 
 
-FIELD_TYPES = {"money": "money", "xml": "xml", "tstzrange": "tstzrange"}
+FIELD_TYPES = {"money": "money", "xml": "xml", "tstzrange": "tstzrange",
+               "jsonb": "jsonb"}
 
 ISO639_1: dict = frozendict(loads(
     (Path(__file__).parent / "languages-data.json").read_bytes()))
@@ -95,6 +124,55 @@ INT2CURRENCY: dict = frozendict(loads(
 ##############################################################################
 
 
+JSONCodec = namedtuple("JSONCodec", "name dumps loads binary")
+
+
+def _orjson_dumps(obj, ensure_ascii: bool=False) -> bytes:
+    if ensure_ascii:  # orjson always emits UTF-8, escape with stdlib instead.
+        return json.dumps(obj, ensure_ascii=True).encode("ascii")
+    return orjson.dumps(obj)
+
+
+# binary=True means dumps() returns bytes and loads() takes bytes/memoryview.
+_JSON_CODECS = {"json": JSONCodec(
+    "json", lambda obj, ensure_ascii=False: json.dumps(
+        obj, ensure_ascii=ensure_ascii), json.loads, False)}
+if ujson:
+    _JSON_CODECS["ujson"] = JSONCodec(
+        "ujson", lambda obj, ensure_ascii=False: ujson.dumps(
+            obj, ensure_ascii=ensure_ascii), ujson.loads, False)
+if orjson:
+    _JSON_CODECS["orjson"] = JSONCodec(
+        "orjson", _orjson_dumps, orjson.loads, True)
+
+JSON_CODECS: dict = frozendict(_JSON_CODECS)  # Only the installed ones.
+
+# ujson else json, orjson is opt-in: it rejects non-str keys and big ints.
+_json_codec = JSON_CODECS.get("ujson", JSON_CODECS["json"])
+
+
+def get_json_codec(codec=None) -> JSONCodec:
+    """Return a JSONCodec by name, default is the global JSON codec."""
+    if codec is None:
+        return _json_codec
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec not in JSON_CODECS:
+        raise ValueError(f"""JSON codec {codec!r} is not installed
+        (valid values must be one of {tuple(JSON_CODECS)} or a JSONCodec).""")
+    return JSON_CODECS[codec]
+
+
+def set_json_codec(codec) -> JSONCodec:
+    """Set the global JSON codec used by JSONField without a codec argument."""
+    global _json_codec
+    _json_codec = get_json_codec(codec)
+    return _json_codec
+
+
+##############################################################################
+
+
 class SimplePasswordField(CharField):
     def __init__(self, salt, min_length: int=8, algorithm: str="sha512",
                  iterations: int=100_000, dklen=None, *args, **kwargs):
@@ -235,25 +313,56 @@ class PositiveDecimalField(DecimalField):
         return value
 
 
+class HexBytes(bytes):
+    """bytes that print as Hexadecimal, the str is only built when printed.
+
+    Compares and hashes as bytes, compare str(value) to Hexadecimal str."""
+
+    def __str__(self) -> str:
+        return self.hex()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.hex()!r})"
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.hex(), format_spec)
+
+
 class HexadecimalField(BlobField):
     """Hexadecimal String Field,stores arbitrary Hexadecimal as Binary.
 
-    Useful for Promo Codes, Redeem Codes, Invitation Codes, etc etc."""
+    Useful for Promo Codes, Redeem Codes, Invitation Codes, etc etc.
+    bytes, bytearray and memoryview values are stored as they are, no copy.
+    output is what python_value() returns: "hex" str, raw "bytes" or
+    "lazy" HexBytes, that only builds the Hexadecimal str when printed."""
     regex = r"^(([0-9A-f])|(0x[0-9A-f]))+$"
+    outputs = ("hex", "bytes", "lazy")
+
+    def __init__(self, output: str="hex", *args, **kwargs):
+        if output not in self.outputs:
+            raise ValueError(f"""{self.__class__.__name__} 'output' argument
+            is not valid (valid values must be one of {self.outputs}): {output}.""")
+        self.output = output
+        super().__init__(*args, **kwargs)
 
     def db_value(self, value):
         if value and isinstance(value, str):
-            if not re.match(self.regex, value):
+            try:  # unhexlify() validates, no Regex pass before it.
+                return binascii.unhexlify(value)
+            except ValueError:
                 raise ValueError((
                     f"{self.__class__.__name__}: Value is not Hexadecimal. "
                     f"(valid values must match a Regex {self.regex}): {value}."
                 ))
-            return binascii.unhexlify(value)
-        return value
+        return value  # bytes, bytearray and memoryview as they are.
 
     def python_value(self, value):
         if value:
-            return binascii.hexlify(value).decode(encoding='UTF-8')
+            if self.output == "hex":
+                return value.hex()  # bytes and memoryview, no hexlify().decode().
+            if self.output == "lazy":
+                return HexBytes(value)
+            return value if type(value) is bytes else bytes(value)
         return value
 
 
@@ -513,33 +622,123 @@ class IANCodeField(CharField):
             return error
 
 
-class PastDateTimeField(DateTimeField):
+EPOCH = datetime(1970, 1, 1)
+
+
+class _BasePastField(object):
+    """Shared fast path of PastDateField and PastDateTimeField.
+
+    Strings try fromisoformat() first, then the format that matched last,
+    then the other formats. "now" is cached for now_granularity seconds,
+    and read again before a value is rejected as in the Future.
+    db_values() checks a whole batch, epoch ints and NumPy datetime64
+    arrays are checked vectorized against 1 "now"."""
+
+    def __init__(self, *args, now_granularity: float=1.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.now_granularity = float(now_granularity)
+        self._now, self._now_until, self._last_format = None, 0.0, None
+
+    def now(self, refresh: bool=False):
+        """Return the cached "now", refreshed every now_granularity seconds."""
+        clock = time.monotonic()
+        if refresh or self._now is None or clock >= self._now_until:
+            self._now = self.clock()
+            self._now_until = clock + self.now_granularity
+        return self._now
+
+    def parse(self, value: str) -> datetime:
+        try:
+            return datetime.fromisoformat(value)  # ISO 8601, C fast path.
+        except ValueError:
+            pass
+        formats = self.formats
+        if self._last_format is not None:
+            formats = (self._last_format, *formats)
+        for datetime_format in formats:
+            try:
+                parsed = datetime.strptime(value, datetime_format)
+            except ValueError:
+                continue   # this datetime_format does not match value.
+            self._last_format = datetime_format
+            return parsed
+        raise ValueError(f"""{self.__class__.__name__} Value is not valid
+        (valid values must match 1 of the formats {self.formats}): {value}.""")
+
+    def db_value(self, value):
+        if value and isinstance(value, str):
+            self.check(self.parse(value), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = self.from_epoch(value)
+            self.check(value, value)
+        elif value and isinstance(value, date):
+            self.check(value, value)
+        return value
+
+    def db_values(self, values) -> list:
+        """Return db_value() of many values, "now" is taken once."""
+        now = self.now(refresh=True)
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return self.db_values_numpy(values)
+        values = values if isinstance(values, list) else list(values)
+        if values and all(type(value) is int for value in values):  # Epoch.
+            if max(values) > self.to_epoch(now):
+                self.check(self.from_epoch(max(values)), max(values))
+            return [self.from_epoch(value) for value in values]
+        return [self.db_value(value) for value in values]
+
+    def db_values_numpy(self, values) -> list:
+        if values.dtype.kind in "iu":  # Epoch seconds.
+            values = values.astype("datetime64[s]")
+        elif values.dtype.kind != "M":
+            return [self.db_value(value) for value in values.tolist()]
+        values = values.astype(self.numpy_unit)
+        future = values > numpy.datetime64(self.now(), self.numpy_unit)
+        if future.any():  # NaT is never in the future.
+            value = values[future.argmax()].tolist()
+            self.check(value, value)
+        return values.tolist()
+
+    @staticmethod
+    def to_epoch(value) -> float:
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return (value.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+class PastDateTimeField(_BasePastField, DateTimeField):
     """DateTimeField clone but dont allow Dates and Times on the Future.
 
     Past is Ok, Present is Ok, Future is Not Ok.
     Most of times you need DateTimes on Past,eg. Bday cant be in the Future."""
+    numpy_unit = "datetime64[us]"
 
-    def db_value(self, value):
+    @staticmethod
+    def clock() -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def from_epoch(value) -> datetime:
+        return EPOCH + timedelta(seconds=value)
+
+    def check(self, valid_datetime, value):
         # developer.mozilla.org/en/docs/Web/HTML/Element/input/datetime-local
-        if value and isinstance(value, str):
-            # http:docs.peewee-orm.com/en/latest/peewee/api.html#DateTimeField
-            for datetime_format in self.formats:
-                try:
-                    valid_datetime = datetime.strptime(value, datetime_format)
-                except Exception:
-                    pass   # this datetime_format does not match value.
-                else:
-                    break  # this datetime_format match value.
-            if valid_datetime.today() > date.today():
-                raise ValueError(f"""{self.__class__.__name__} Dates & Times
-                Value is not in the Past (valid values must be in the Past):
-                {valid_datetime}, {value} > {datetime.utcnow().isoformat()}""")
-        if value and isinstance(value, datetime):
-            if value > datetime.utcnow():
-                raise ValueError(f"""{self.__class__.__name__} Dates & Times
-                Value is not in the Past (valid values must be in the Past):
-                {value} > {datetime.utcnow().isoformat()}.""")
-        return value
+        now = self.now()
+        if valid_datetime.tzinfo is not None:
+            now = now.replace(tzinfo=timezone.utc)
+        if valid_datetime > now:  # The cached "now" may be stale, re-read it.
+            now = self.now(refresh=True)
+            if valid_datetime.tzinfo is not None:
+                now = now.replace(tzinfo=timezone.utc)
+        if valid_datetime > now:
+            raise ValueError(f"""{self.__class__.__name__} Dates & Times
+            Value is not in the Past (valid values must be in the Past):
+            {valid_datetime}, {value} > {now.isoformat()}.""")
+
+    def db_value(self, value):
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return value  # Only datetimes were ever checked.
+        return super().db_value(value)
 
     @staticmethod
     def get_html_widget(clas: tuple=None, ids: str=None,
@@ -551,32 +750,29 @@ class PastDateTimeField(DateTimeField):
                 f'''max="{datetime.utcnow().strftime('%Y-%m-%dT%H:%M')}">\n''')
 
 
-class PastDateField(DateField):
+class PastDateField(_BasePastField, DateField):
     """DateField clone but dont allow Dates on the Future.
 
     Past is Ok, Present is Ok, Future is Not Ok.
     Most of times you need Dates on the Past,eg. Bday cant be in the Future."""
+    numpy_unit = "datetime64[D]"
 
-    def db_value(self, value):  # check if its valid for date()
-        if value and isinstance(value, str):
-            # http:developer.mozilla.org/en-US/docs/Web/HTML/Element/input/date
-            for date_format in self.formats:
-                try:  # docs.peewee-orm.com/en/latest/peewee/api.html#DateField
-                    valid_date = datetime.strptime(value, date_format).date()
-                except Exception:
-                    pass   # this date_format does not match value.
-                else:
-                    break  # this date_format match value.
-            if valid_date > date.today():
-                raise ValueError(f"""{self.__class__.__name__} Dates Value is
-                not in the Past (valid values must be in the Past or Present):
-                {valid_date}, {value} > {date.today()}.""")
-        if value and isinstance(value, date):
-            if value > date.today():
-                raise ValueError(f"""{self.__class__.__name__} Dates Value is
-                not in the Past (valid values must be in the Past or Present):
-                {value} > {date.today()}.""")
-        return value
+    @staticmethod
+    def clock() -> date:
+        return date.today()
+
+    @staticmethod
+    def from_epoch(value) -> date:
+        return (EPOCH + timedelta(seconds=value)).date()
+
+    def check(self, valid_date, value):
+        # http:developer.mozilla.org/en-US/docs/Web/HTML/Element/input/date
+        if isinstance(valid_date, datetime):
+            valid_date = valid_date.date()
+        if valid_date > self.now() and valid_date > self.now(refresh=True):
+            raise ValueError(f"""{self.__class__.__name__} Dates Value is
+            not in the Past (valid values must be in the Past or Present):
+            {valid_date}, {value} > {self.now()}.""")
 
     @staticmethod
     def get_html_widget(clas: tuple=None, ids: str=None,
@@ -726,6 +922,140 @@ class CountryISOCodeField(SmallIntegerField):
             return html_widget
 
 
+InternationalZipCode = namedtuple("InternationalZipCode", "country postal_code")
+
+# Country ISO Code -> compiled Regex of its XXZipCodeField, built once.
+ZIP_CODE_PATTERNS: dict = frozendict({
+    name[:2].lower(): re.compile(field_class.regex)
+    for name, field_class in sorted(vars(regex_fields).items())
+    if re.fullmatch(r"[A-Z]{2}ZipCodeField", name)})
+
+
+class InternationalZipCodeCountryField(CountryISOCodeField):
+    """Country column of an InternationalZipCodeField, returns "DE" str."""
+
+    def python_value(self, value):
+        if value and isinstance(value, int):
+            return INT2COUNTRY[str(value)].upper()
+        return value
+
+
+class InternationalZipCodeAccessor(FieldAccessor):
+    """Joins the postal code and the country columns."""
+
+    def __get__(self, instance, instance_type=None):
+        if instance is None:
+            return self.field
+        value = instance.__data__.get(self.name)
+        if value is None or isinstance(value, InternationalZipCode):
+            return value
+        return InternationalZipCode(instance.__data__.get(
+            self.field.country_name), value)
+
+    def __set__(self, instance, value):
+        if isinstance(value, (tuple, list)):  # Plain values are the code.
+            value = self.field.to_zip_code(value)
+            instance.__data__[self.field.country_name] = value.country
+            instance._dirty.add(self.field.country_name)
+        super().__set__(instance, value)
+
+
+class InternationalZipCodeField(CharField):
+    """Postal Code of any Country, validates (country, postal_code) pairs.
+
+    The Regex of the Country XXZipCodeField is looked up on the dispatch
+    table ZIP_CODE_PATTERNS, this column stores the postal code and
+    "<name>_country" the Country as a CountryISOCodeField small integer.
+    Returns InternationalZipCode(country, postal_code), country is "DE".
+    Countries without a XXZipCodeField are not validated, unless strict.
+    validate_many() groups the rows by Country, 1 loop per Regex.
+    equals() matches both columns, index them with
+    Model.add_index(Model.field_country, Model.field)."""
+
+    def __init__(self, strict: bool=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.strict = bool(strict)
+
+    def bind(self, model, name, set_attribute=True):
+        super().bind(model, name, set_attribute)
+        if set_attribute:
+            setattr(model, name, InternationalZipCodeAccessor(model, self, name))
+        if self.country_name not in model._meta.fields:
+            model._meta.add_field(self.country_name, InternationalZipCodeCountryField(
+                null=self.null, column_name=f"{self.column_name}_country"))
+        write_companions(model)
+
+    @property
+    def country_name(self) -> str:
+        return f"{self.name}_country"
+
+    @property
+    def country_field(self):
+        return self.model._meta.fields[self.country_name]
+
+    @property
+    def companion_name(self) -> str:
+        return self.country_name
+
+    def split(self, value):
+        """Return (zip code, country) of a tuple, None for a postal code."""
+        if isinstance(value, (tuple, list)):
+            value = self.to_zip_code(value)
+            return value, value.country
+        return None
+
+    def to_zip_code(self, value) -> InternationalZipCode:
+        country, postal_code = value
+        if not isinstance(country, str) or country.lower() not in ISO3166:
+            raise ValueError(f"""{self.__class__.__name__} Country is not an
+            ISO-3166 Standard Country Code of 2 Characters long
+            (valid values must be ISO-3166 Country Codes): {country}.""")
+        return InternationalZipCode(country.upper(), postal_code.strip())
+
+    def check(self, value: InternationalZipCode):
+        pattern = ZIP_CODE_PATTERNS.get(value.country.lower())
+        if pattern is None and self.strict:
+            raise ValueError(f"""{self.__class__.__name__} Country has no
+            Postal Code format (valid values must be one of
+            {tuple(ZIP_CODE_PATTERNS)}): {value.country}.""")
+        if pattern is not None and not pattern.match(value.postal_code):
+            raise ValueError(f"""{self.__class__.__name__} Value string is
+            not a valid {value.country} Postal Code (valid values must
+            match a Regex {pattern.pattern}): {value.postal_code}.""")
+
+    def db_value(self, value):
+        if isinstance(value, (tuple, list)):
+            value = self.to_zip_code(value)
+            self.check(value)
+            value = value.postal_code
+        return super().db_value(value)
+
+    def validate_many(self, values) -> list:
+        """Return a list of bools, the valid (country, postal_code) pairs."""
+        values = values if isinstance(values, list) else list(values)
+        results, groups = [False] * len(values), defaultdict(list)
+        for index, (country, postal_code) in enumerate(values):
+            if isinstance(country, str) and isinstance(postal_code, str):
+                groups[country.lower()].append(index)
+        for country, indexes in groups.items():
+            if country not in ISO3166:
+                continue
+            pattern = ZIP_CODE_PATTERNS.get(country)
+            if pattern is None:
+                for index in indexes:
+                    results[index] = not self.strict
+                continue
+            match = pattern.match  # OPTIMIZATION
+            for index in indexes:
+                results[index] = match(values[index][1].strip()) is not None
+        return results
+
+    def equals(self, value):
+        """Expression matching both the country and the postal code."""
+        value = self.to_zip_code(value)
+        return (self == value.postal_code) & (self.country_field == value.country)
+
+
 class CurrencyISOCodeField(SmallIntegerField):
     """SmallIntegerField clone only accepts Currency ISO Code values.
 
@@ -797,47 +1127,112 @@ class CurrencyISOCodeField(SmallIntegerField):
             return html_widget
 
 
+class AsciiFold(dict):
+    """str.translate() table that folds accented letters to ASCII, "ñ" > "n".
+
+    Filled lazily, each character is decomposed (NFKD) once and cached,
+    characters without an ASCII form are left as they are."""
+
+    def __missing__(self, codepoint: int):
+        folded = unicodedata.normalize("NFKD", chr(codepoint)).encode(
+            "ascii", "ignore").decode("ascii")
+        self[codepoint] = folded = folded or codepoint
+        return folded
+
+
+ASCII_FOLD = AsciiFold()
+
+
 class CharFieldCustom(CharField):
-    """CharField clone but has additional options, min_len,blacklist,etc."""
-    # TODO improve blacklist/whitelist matching somehow?, how?.  Better Name?.
+    """CharField clone but has additional options, min_len,blacklist,etc.
+
+    blacklist and whitelist are matched case insensitive in list_match mode:
+    "exact" the whole value, "word" any word or run of words of the value,
+    "substring" any entry anywhere in the value (Aho-Corasick, built once).
+    Pass a MappedWordList to share 1 mmap-ed list file across workers.
+
+    use_lower, transliterate, force_ascii and force_slugify are compiled
+    on __init__ into 1 normalization plan, call compile_plan() after
+    changing them. transliterate is a {character: replacement} dict or True
+    for ASCII_FOLD, it runs before force_ascii replaces what is left."""
+    _non_ascii = re.compile(r"[^\x00-\x7F]+")
+    _not_slug = re.compile(r"[^a-z0-9_\-]+", re.IGNORECASE)
+
     def __init__(self, min_lenght: int=None, use_lower: bool=False,
                  blacklist: tuple=None, whitelist: tuple=None,
                  force_ascii: str=None, force_slugify: bool=False,
+                 list_match: str="exact", transliterate: dict=None,
                  *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.blacklist = tuple(sorted(set(blacklist))) if blacklist else None
-        self.whitelist = tuple(sorted(set(whitelist))) if whitelist else None
+        self.list_match = list_match
+        self.blacklist = WordMatcher(blacklist, list_match) if blacklist else None
+        self.whitelist = WordMatcher(whitelist, list_match) if whitelist else None
         self.min_lenght = int(min_lenght) if min_lenght else None
         self.force_ascii = force_ascii
         self.force_slugify = force_slugify
         self.use_lower = use_lower
+        self.transliterate = transliterate
+        self.compile_plan()
+
+    def compile_plan(self):
+        """Compile the options into the steps of the normalization plan."""
+        if self.transliterate is True:
+            self._translation = ASCII_FOLD
+        elif self.transliterate:
+            self._translation = str.maketrans(self.transliterate)
+        else:
+            self._translation = None
+        steps = []
+        if self._translation is not None or self.force_ascii is not None:
+            steps.append(self.fold)
+        if self.force_slugify:
+            steps.append(partial(self._not_slug.sub, "-"))
+        self._steps = tuple(steps)
+
+    def fold(self, value: str) -> str:
+        if value.isascii():  # Most values, no work to do.
+            return value
+        if self._translation is not None:
+            value = value.translate(self._translation)
+        if self.force_ascii is not None:
+            value = self._non_ascii.sub(self.force_ascii, value)
+        return value
 
-    def db_value(self, value):
-
-        if value and self.use_lower:
-            value = value.lower()
-
-        if value and self.min_lenght and not len(value) >= self.min_lenght:
+    def check(self, value: str):
+        if self.min_lenght and not len(value) >= self.min_lenght:
             raise ValueError(
                 (f"{self} Value string is too short (valid values must be a "
                  f"string of {self.min_lenght} characters or more): {value}."))
 
-        if value and self.blacklist and value.lower() in self.blacklist:
+        if self.blacklist and value in self.blacklist:
             raise ValueError(f"{self} Value string is black-listed: {value}.")
 
-        if value and self.whitelist and value.lower() not in self.whitelist:
+        if self.whitelist and value not in self.whitelist:
             raise ValueError((f"{self} Value string requires at least 1 "
                               "white-listed value present: {value}."))
 
-        if value and self.force_ascii is not None:
-            value = re.sub(r"[^\x00-\x7F]+", self.force_ascii,
-                           value, flags=re.IGNORECASE)
-
-        if value and self.force_slugify:
-            value = re.sub(r'[^a-z0-9_\-]+', '-', value, flags=re.IGNORECASE)
-
+    def db_value(self, value):
+        if value:
+            if self.use_lower:
+                value = value.lower()
+            self.check(value)
+            for step in self._steps:
+                value = step(value)
         return value
 
+    def db_values(self, values) -> list:
+        """Return db_value() of many values, 1 step at a time on the column."""
+        values = list(values)
+        if self.use_lower:
+            values = [value.lower() if value else value for value in values]
+        if self.min_lenght or self.blacklist or self.whitelist:
+            for value in values:
+                if value:
+                    self.check(value)
+        for step in self._steps:
+            values = [step(value) if value else value for value in values]
+        return values
+
 
 class CSVField(CharField):
     """CharField clone but only accepts CSV string values (comma separated).
@@ -1029,145 +1424,737 @@ class EmailField(CharField):
 
 
 class EnumField(SmallIntegerField):
-    """This class enables a Enum like field for Peewee."""
+    """This class enables a Enum like field for Peewee.
+
+    Stores the value of the member, accepts a member, a value or a name.
+    The value -> member dict is precomputed, python_value() is 1 lookup,
+    python_values() and db_values() convert many values at once."""
 
     def __init__(self, enum, *args, **kwargs):
-        if not issubclass(enum, Enum):
+        if not isinstance(enum, type) or not issubclass(enum, Enum):
             raise TypeError((f"{self.__class__.__name__} Argument enum must be"
                              f" subclass of enum.Enum: {enum} {type(enum)}."))
         self.enum = enum
+        self.members = frozendict({member.value: member for member in enum})
         super().__init__(*args, **kwargs)
 
     def db_value(self, member):
-        return member.value
+        return None if member is None else self.to_member(member).value
 
     def get_enum(self):
         return self.enum
 
     def python_value(self, value):
-        enum = self.get_enum()
-        return enum(value)
+        return None if value is None else self.to_member(value)
 
-    def coerce(self, value):
-        enum = self.get_enum()
-        if value not in enum:
-            raise ValueError((f"{self.__class__.__name__} the value must be "
-                              f"member of the enum: {value}, {enum}."))
+    def to_member(self, value):
+        """Return the member of a member, a value or a name."""
+        if isinstance(value, self.enum):
+            return value
+        try:
+            return self.members[value]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(value, str) and value in self.enum.__members__:
+            return self.enum[value]
+        raise ValueError((f"{self.__class__.__name__} the value must be "
+                          f"member of the enum: {value}, {self.enum}."))
+
+    def coerce(self, value=True):
+        if isinstance(value, bool):  # Peewee ColumnBase.coerce(_coerce).
+            return super().coerce(value)
+        return self.to_member(value)
+
+    def db_values(self, members) -> list:
+        """Return db_value() of many members."""
+        return [None if member is None else self.to_member(member).value
+                for member in members]
+
+    def python_values(self, values) -> list:
+        """Return python_value() of many values, 1 dict lookup each."""
+        members = self.members
+        try:
+            return [None if value is None else members[value]
+                    for value in values]
+        except (KeyError, TypeError):  # Names or invalid values, slow path.
+            return [self.python_value(value) for value in values]
+
+
+class FlagField(BigIntegerField):
+    """enum.Flag set stored as 1 integer, eg. permissions or features.
+
+    has_any() and has_all() are bitwise SQL, no join table is needed.
+    Accepts a Flag, an int or an iterable of Flags, returns a Flag."""
+
+    def __init__(self, enum, *args, **kwargs):
+        if not isinstance(enum, type) or not issubclass(enum, Flag):
+            raise TypeError((f"{self.__class__.__name__} Argument enum must be"
+                             f" subclass of enum.Flag: {enum} {type(enum)}."))
+        self.enum = enum
+        self.mask = reduce(operator.or_, (member.value for member in enum), 0)
+        if self.mask.bit_length() > 63:
+            raise ValueError(f"""{self.__class__.__name__} Argument enum has
+            too many Flags (valid values must fit 63 bits): {enum}.""")
+        self._members = {}  # int -> Flag, at most 1 per used combination.
+        super().__init__(*args, **kwargs)
+
+    def to_int(self, value) -> int:
+        if isinstance(value, self.enum):
+            value = value.value
+        elif not isinstance(value, int):
+            value = reduce(operator.or_,
+                           (self.to_int(flag) for flag in value), 0)
+        if value & ~self.mask:
+            raise ValueError(f"""{self.__class__.__name__} Value has unknown
+            Flags (valid values must be Flags of {self.enum}): {value}.""")
+        return value
+
+    def db_value(self, value):
+        return None if value is None else self.to_int(value)
+
+    def python_value(self, value):
+        if value is None:
+            return value
+        try:
+            return self._members[value]
+        except KeyError:
+            member = self._members[value] = self.enum(value)
+            return member
+
+    def has_any(self, flags):
+        """Expression of the rows with at least 1 of flags: field & flags != 0."""
+        return self.bin_and(self.to_int(flags)) != 0
+
+    def has_all(self, flags):
+        """Expression of the rows with all the flags: field & flags = flags."""
+        flags = self.to_int(flags)
+        return self.bin_and(flags) == flags
 
 
 class MoneyField(Field):
     """Money Field, uses Native Monetary Database Type, accepts int,float,str.
 
     8 Bytes, from $ -92233720368547758.08 to $ +92233720368547758.07.
-    https://www.postgresql.org/docs/current/static/datatype-money.html."""
+    https://www.postgresql.org/docs/current/static/datatype-money.html.
+
+    minor_units=2 stores portable BIGINT minor units (cents) on any
+    database instead, returns Decimal, values with more decimals than
+    minor_units are rejected, never rounded. sum() and avg() aggregate the
+    integers in SQL, currency_field names a CurrencyISOCodeField of the
+    Model to get totals() per currency."""
     field_type = 'money'
+    BIGINT_MAX = 9_223_372_036_854_775_807
+
+    def __init__(self, minor_units: int=None, currency_field: str=None,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.minor_units = minor_units
+        self.currency_field = currency_field
+        if minor_units is not None:
+            self.field_type = "BIGINT"
+            self.scale = 10 ** minor_units
+            self.quantizer = Decimal(1).scaleb(-minor_units)  # eg. 0.01.
 
     def db_value(self, value):
         if not isinstance(value, (int, float, str, Decimal, type(None))):
             raise TypeError((
                 f"{self.__class__.__name__} Monetary value must be of Type "
                 f"int, float, str, Decimal or None: {value}, {type(value)}."))
-        return value
+        if self.minor_units is None or value is None:
+            return value
+        if type(value) is int:  # Fast path, no Decimal at all.
+            minor = value * self.scale
+        else:
+            try:
+                value = Decimal(repr(value) if isinstance(value, float)
+                                else value)
+                minor = value.scaleb(self.minor_units)
+            except InvalidOperation:
+                raise ValueError(f"""{self.__class__.__name__} Monetary value
+                is not a valid number: {value}.""")
+            if not minor.is_finite() or minor != minor.to_integral_value():
+                raise ValueError(f"""{self.__class__.__name__} Monetary value
+                has more decimals than minor units (valid values must have
+                {self.minor_units} decimals max): {value}.""")
+            minor = int(minor)
+        if not -self.BIGINT_MAX <= minor <= self.BIGINT_MAX:
+            raise ValueError(f"""{self.__class__.__name__} Monetary value is
+            out of range of BIGINT minor units: {value}.""")
+        return minor
+
+    def python_value(self, value):
+        if self.minor_units is None or value is None:
+            return value
+        return Decimal(int(value)).scaleb(-self.minor_units)  # Exact.
+
+    def avg_value(self, value):
+        if value is None:
+            return value
+        return Decimal(str(value)).scaleb(-self.minor_units).quantize(
+            self.quantizer, ROUND_HALF_EVEN)
+
+    def sum(self):
+        """SQL SUM() of the minor units, returns Decimal."""
+        return fn.SUM(self).coerce(True).python_value(self.python_value)
+
+    def avg(self):
+        """SQL AVG() of the minor units, returns Decimal rounded half even."""
+        return fn.AVG(self).coerce(True).python_value(self.avg_value)
+
+    def totals(self, query=None) -> dict:
+        """Return {currency code: Decimal total} aggregated in SQL."""
+        currency = self.model._meta.fields[self.currency_field]
+        query = (query or self.model.select()).select(
+            currency, self.sum()).group_by(currency)
+        return {getattr(code, "code", code): total
+                for code, total in query.tuples()}
+
+
+class XMLString(str):
+    """XML str from XMLField(lazy=True), parsed on first use of .element."""
+
+    @cached_property
+    def element(self) -> ET.Element:
+        return ET.fromstring(self)
 
 
 class XMLField(Field):
     """XML Field, uses Native XML Database Type, accepts str.
 
     Works with XML, SVG, XHTML, etc.
-    https://www.postgresql.org/docs/current/static/datatype-xml.html."""
+    https://www.postgresql.org/docs/current/static/datatype-xml.html.
+    With a Compressor it is stored compressed as BLOB instead of xml type.
+
+    Values are checked streaming with expat, no Element tree is built,
+    max_size (characters) and max_depth (nested elements) reject abusive
+    values early, forbid_entities rejects DTD entity declarations.
+    With lazy=True python_value() returns a XMLString, a str whose .element
+    is the Element tree parsed on first access and then cached."""
     field_type = 'xml'
+    chunk_size = 65_536
+
+    def __init__(self, compressor: Compressor=None, max_size: int=None,
+                 max_depth: int=None, forbid_entities: bool=False,
+                 lazy: bool=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compressor = compressor
+        self.max_size = int(max_size) if max_size else None
+        self.max_depth = int(max_depth) if max_depth else None
+        self.forbid_entities = bool(forbid_entities)
+        self.lazy = bool(lazy)
+        if compressor:
+            self.field_type = "BLOB"
 
     def db_value(self, value):
         if value and isinstance(value, str):
             value = value.strip()
-            try:
-                ET.fromstring(value)
-            except Exception as error:
-                raise ValueError((
-                    f"{self.__class__.__name__} Value is not valid XML data. "
-                    f"(valid values must be parseable by {ET}): {error}."))
+            self.check_xml(value)
+        if self.compressor:
+            value = self.compressor.compress(value)
         return value
 
+    def python_value(self, value):
+        if self.compressor and value is not None:
+            value = self.compressor.decompress(value).decode("utf-8")
+        if self.lazy and isinstance(value, str):
+            value = XMLString(value)
+        return value
+
+    def check_xml(self, value: str) -> None:
+        """Raise ValueError if value is not well formed XML or is abusive."""
+        if self.max_size and len(value) > self.max_size:
+            raise ValueError((
+                f"{self.__class__.__name__} Value is too big XML data. "
+                f"(valid values must be {self.max_size} Characters or less):"
+                f" {len(value)} Characters."))
+
+        depth = 0
+
+        def start_element(name, attributes):
+            nonlocal depth
+            depth += 1
+            if self.max_depth and depth > self.max_depth:
+                raise ValueError((
+                    f"{self.__class__.__name__} Value is too deep XML data. "
+                    f"(valid values must have {self.max_depth} nested "
+                    f"Elements or less): {name} at depth {depth}."))
+
+        def end_element(name):
+            nonlocal depth
+            depth -= 1
+
+        def entity_declaration(name, *args):
+            raise ValueError((
+                f"{self.__class__.__name__} Value has XML Entities. "
+                f"(valid values must not declare DTD Entities): {name}."))
+
+        parser = expat.ParserCreate()
+        if self.max_depth:  # Python callbacks only when they are needed.
+            parser.StartElementHandler = start_element
+            parser.EndElementHandler = end_element
+        if self.forbid_entities:
+            parser.EntityDeclHandler = entity_declaration
+        try:
+            for index in range(0, len(value), self.chunk_size):
+                parser.Parse(value[index:index + self.chunk_size], False)
+            parser.Parse("", True)
+        except expat.ExpatError as error:
+            raise ValueError((
+                f"{self.__class__.__name__} Value is not valid XML data. "
+                f"(valid values must be well formed XML): {error}."))
+
+
+def utc_datetime(value) -> datetime:
+    """Return value as an aware UTC datetime, naive values are UTC already."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().strip('"'))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def utc_text(value) -> str:
+    """Return value as UTC ISO text that sorts like the datetimes."""
+    value = utc_datetime(value)
+    return None if value is None else value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class DateTimeTZRange(namedtuple("DateTimeTZRange", "lower upper bounds")):
+    """Range of 2 aware datetimes, None is unbounded, bounds like "[)".
+
+    empty is DateTimeTZRange(None, None, "empty")."""
+    __slots__ = ()
+
+    def __new__(cls, lower=None, upper=None, bounds: str="[)"):
+        if bounds not in ("[)", "[]", "(]", "()", "empty"):
+            raise ValueError(f"""{cls.__name__} 'bounds' argument is not
+            valid (valid values must be 1 of '[)', '[]', '(]', '()'): {bounds}.""")
+        lower, upper = utc_datetime(lower), utc_datetime(upper)
+        if lower is not None and upper is not None and lower > upper:
+            raise ValueError(f"""{cls.__name__} Value is not valid (valid
+            values must have lower <= upper): {lower} > {upper}.""")
+        return super().__new__(cls, lower, upper, bounds)
+
+    def __str__(self) -> str:  # PostgreSQL range literal.
+        if self.isempty:
+            return "empty"
+        lower = f'"{self.lower.isoformat()}"' if self.lower else ""
+        upper = f'"{self.upper.isoformat()}"' if self.upper else ""
+        return f"{self.bounds[0]}{lower},{upper}{self.bounds[1]}"
+
+    def __contains__(self, value) -> bool:
+        if self.isempty:
+            return False
+        value = utc_datetime(value)
+        if self.lower is not None and (value < self.lower or (
+                value == self.lower and not self.lower_inc)):
+            return False
+        return self.upper is None or value < self.upper or (
+            value == self.upper and self.upper_inc)
+
+    @classmethod
+    def parse(cls, text: str):
+        """Return the DateTimeTZRange of a PostgreSQL range literal."""
+        text = text.strip()
+        if text == "empty":
+            return cls(bounds="empty")
+        lower, upper = text[1:-1].split(",")
+        return cls(lower, upper, text[0] + text[-1])
+
+    @property
+    def isempty(self) -> bool:
+        return self.bounds == "empty"
+
+    @property
+    def lower_inc(self) -> bool:
+        return self.bounds[0] == "["
+
+    @property
+    def upper_inc(self) -> bool:
+        return self.bounds[-1] == "]"
+
+    def overlaps(self, other) -> bool:
+        other = as_range(other)
+        if self.isempty or other.isempty:
+            return False
+        return (self.lower is None or other.upper is None or
+                self.lower < other.upper) and (
+                self.upper is None or other.lower is None or
+                other.lower < self.upper)
+
+
+def as_range(value) -> DateTimeTZRange:
+    """Return value as DateTimeTZRange, value is a range or a tuple."""
+    return value if isinstance(value, DateTimeTZRange) else DateTimeTZRange(*value)
+
+
+class DateTimeTZRangeAccessor(FieldAccessor):
+    """Joins the lower and the upper columns of SQLite and MySQL."""
+
+    def __get__(self, instance, instance_type=None):
+        if instance is None:
+            return self.field
+        value = instance.__data__.get(self.name)
+        upper = instance.__data__.get(self.field.upper_name)
+        if (value is None and upper is None) or isinstance(value, DateTimeTZRange):
+            return value
+        return DateTimeTZRange(value, upper)
+
+    def __set__(self, instance, value):
+        if isinstance(value, (tuple, list)):  # Plain values are the lower.
+            value = as_range(value)
+            instance.__data__[self.field.upper_name] = value.upper
+            instance._dirty.add(self.field.upper_name)
+        super().__set__(instance, value)
+
+
+class DateTimeTZRangeUpperField(Field):
+    """Upper bound column of a DateTimeTZRangeField on SQLite and MySQL."""
+    field_type = "TEXT"
+
+    def db_value(self, value):
+        return utc_text(value.upper if isinstance(value, DateTimeTZRange)
+                        else value)
+
+    def python_value(self, value):
+        return utc_datetime(value)
+
 
 class DateTimeTZRangeField(Field):
-    """Date&Time Time Zone Field usin 'tstzrange' PostgreSQL type."""
-    db_field = 'tstzrange'
+    """Date&Time Time Zone Field usin 'tstzrange' PostgreSQL type.
+
+    Returns a DateTimeTZRange, overlaps(), contains() and adjacent() are
+    &&, @> and -|- on PostgreSQL, index=True creates a GiST index.
+    Other databases store [) ranges on 2 UTC ISO TEXT columns, this column
+    has the lower bound and "<name>_upper" the upper one, index both with
+    Model.add_index(Model.field, Model.field_upper), None is unbounded.
+    max_duration (a timedelta) rejects longer ranges and lets overlaps()
+    scan only lower bounds from value.lower - max_duration on 2 columns.
+    two_columns=None detects it from the Model database on bind(), it must
+    be given when the database is not known yet, like a DatabaseProxy."""
+    field_type = "tstzrange"
+    db_field = "tstzrange"
+
+    def __init__(self, two_columns: bool=None, max_duration=None,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.two_columns = two_columns
+        self.max_duration = max_duration
+
+    def bind(self, model, name, set_attribute=True):
+        super().bind(model, name, set_attribute)
+        if self.two_columns is None:
+            if model_database(self) is None:
+                raise ValueError(f"""{self.__class__.__name__} 'two_columns'
+                argument is required when the Model database is not known on
+                bind, like an uninitialized DatabaseProxy (valid values must
+                be True or False): {model.__name__}.{name}.""")
+            self.two_columns = not is_postgresql(self)
+        if self.two_columns:
+            self.field_type = "TEXT"
+            if set_attribute:
+                setattr(model, name, DateTimeTZRangeAccessor(model, self, name))
+            if self.upper_name not in model._meta.fields:
+                model._meta.add_field(self.upper_name, DateTimeTZRangeUpperField(
+                    null=self.null, column_name=f"{self.column_name}_upper"))
+            write_companions(model)
+        else:
+            self.index_type = self.index_type or "GIST"
+
+    @property
+    def upper_name(self) -> str:
+        return f"{self.name}_upper"
+
+    @property
+    def upper_field(self):
+        return self.model._meta.fields[self.upper_name]
+
+    @property
+    def companion_name(self) -> str:
+        return self.upper_name if self.two_columns else None
+
+    def split(self, value):
+        """Return (range, upper) of a range or a tuple, None for the lower."""
+        if isinstance(value, (tuple, list)):
+            value = as_range(value)
+            return value, value.upper
+        return None
+
+    def db_value(self, value):
+        if isinstance(value, (tuple, list)):
+            value = as_range(value)
+        if self.max_duration and isinstance(value, DateTimeTZRange) and (
+                value.lower is None or value.upper is None or
+                value.upper - value.lower > self.max_duration):
+            raise ValueError(f"""{self.__class__.__name__} Value is too long
+            (valid values must be shorter than {self.max_duration}): {value}.""")
+        if self.two_columns:
+            if isinstance(value, DateTimeTZRange):
+                if value.bounds != "[)":
+                    raise ValueError(f"""{self.__class__.__name__} Value
+                    bounds are not valid (valid values on 2 columns must be
+                    '[)'): {value.bounds}.""")
+                value = value.lower
+            return utc_text(value)
+        return None if value is None else str(value)
+
+    def python_value(self, value):
+        if value is None or isinstance(value, DateTimeTZRange):
+            return value
+        if self.two_columns:
+            return utc_datetime(value)  # The accessor joins the upper bound.
+        if isinstance(value, str):
+            return DateTimeTZRange.parse(value)
+        if getattr(value, "isempty", False):  # psycopg Range objects.
+            return DateTimeTZRange(bounds="empty")
+        bounds = ("[" if value.lower_inc else "(") + (
+            "]" if value.upper_inc else ")")
+        return DateTimeTZRange(value.lower, value.upper, bounds)
+
+    def range_sql(self, value):
+        return Cast(Value(str(value), converter=False), "tstzrange")
 
+    @staticmethod
+    def unbounded_or(column, expression):
+        """NULL is unbounded, NOT NULL columns skip the IS NULL for indexes."""
+        return (column.is_null() | expression) if column.null else expression
+
+    def overlaps(self, value):
+        """Expression of the rows that overlap value, a range or a tuple."""
+        value = as_range(value)
+        if not self.two_columns:
+            return Expression(self, "&&", self.range_sql(value))
+        lower, upper = self, self.upper_field
+        conditions = [SQL("1 = 0")] if value.isempty else []
+        if value.upper is not None:
+            conditions.append(self.unbounded_or(lower, lower < value.upper))
+        if value.lower is not None:
+            conditions.append(self.unbounded_or(upper, upper > value.lower))
+            if self.max_duration:  # Bounded index range scan of lower.
+                conditions.append(lower > value.lower - self.max_duration)
+        return reduce(operator.and_, conditions) if conditions else SQL("1 = 1")
+
+    def contains(self, value):
+        """Expression of the rows containing value, a datetime or a range."""
+        if not self.two_columns:
+            if isinstance(value, datetime):
+                return Expression(self, "@>", Cast(Value(
+                    utc_datetime(value).isoformat(), converter=False),
+                    "timestamptz"))
+            return Expression(self, "@>", self.range_sql(as_range(value)))
+        lower, upper = self, self.upper_field
+        if isinstance(value, datetime):
+            return (self.unbounded_or(lower, lower <= value) &
+                    self.unbounded_or(upper, upper > value))
+        value = as_range(value)
+        if value.isempty:
+            return SQL("1 = 1")
+        return ((lower.is_null() if value.lower is None else
+                 self.unbounded_or(lower, lower <= value.lower)) &
+                (upper.is_null() if value.upper is None else
+                 self.unbounded_or(upper, upper >= value.upper)))
+
+    def adjacent(self, value):
+        """Expression of the rows that end where value starts or vice versa."""
+        value = as_range(value)
+        if not self.two_columns:
+            return Expression(self, "-|-", self.range_sql(value))
+        conditions = []
+        if value.lower is not None:
+            conditions.append(self.upper_field == value.lower)
+        if value.upper is not None:
+            conditions.append(self == value.upper)
+        return reduce(operator.or_, conditions) if conditions else SQL("1 = 0")
 
 
 class TextField(TextField):
-    def __init__(self, validators: typing.Union = (typing.AnyStr, typing.Callable), *args, **kwargs):
-        self.validators:  typing.Tuple  = validators
+    """TextField with validators, optionally stored compressed as BLOB.
+
+    Values are valid if they match any validator: a str (equal), a compiled
+    re.Pattern (fullmatch) or a callable (returns True), no validators is
+    always valid. They are compiled once on __init__, str into a frozenset,
+    so 100_000 allowed strings cost 1 hash lookup, not 100_000 comparisons.
+    Call compile_validators() after changing self.validators."""
+
+    def __init__(self, validators: typing.Iterable[typing.Union[
+            str, re.Pattern, typing.Callable]] = (),
+            compressor: Compressor = None, *args, **kwargs):
+        self.validators: typing.Tuple = tuple(validators)
+        self.compressor = compressor
 
         super().__init__(*args, **kwargs)
+        if compressor:
+            self.field_type = "BLOB"
+        self.compile_validators()
+
+    def compile_validators(self):
+        """Split self.validators into a frozenset, patterns and callables."""
+        self._strings = frozenset(
+            validator for validator in self.validators
+            if isinstance(validator, str))
+        self._patterns = tuple(
+            validator.fullmatch for validator in self.validators
+            if isinstance(validator, re.Pattern))
+        self._callables = tuple(
+            validator for validator in self.validators
+            if callable(validator) and not isinstance(
+                validator, (str, re.Pattern)))
+        self._validate = bool(self.validators)
 
     def db_value(self, value):
         if self.run_validators(value) is False:
             raise exceptions.ValidationError(f"The value({value}) failed validation")
 
-        return value
+        return self.compress(value)
+
+    def db_values(self, values) -> list:
+        """Return db_value() of many values, raise on the first invalid."""
+        values = list(values)
+        for value, valid in zip(values, self.run_validators_many(values)):
+            if not valid:
+                raise exceptions.ValidationError(f"The value({value}) failed validation")
+        return [self.compress(value) for value in values]
+
+    def python_value(self, value):
+        if self.compressor and value is not None:
+            value = self.compressor.decompress(value).decode("utf-8")
+        return super().python_value(value)
+
+    def compress(self, value):
+        return self.compressor.compress(value) if self.compressor else value
 
     def run_validators(self, value):
-        for validator in self.validators:
-            if isinstance(validator, str):
-                result = value == validator
-            else:  # Validator function
-                result = validator(value)
-
-            if result:
-                break
-        else:
-            result = False
+        if not self._validate:
+            return True
+        try:
+            if value in self._strings:
+                return True
+        except TypeError:
+            pass  # Unhashable values can not be equal to a str.
+        if self._patterns and isinstance(value, str):
+            for fullmatch in self._patterns:
+                if fullmatch(value):
+                    return True
+        for validator in self._callables:
+            if validator(value):
+                return True
+        return False
 
-        return result
+    def run_validators_many(self, values) -> list:
+        """Return a list of run_validators() results, eg. for a column."""
+        if self._strings and not (self._patterns or self._callables):
+            strings = self._strings
+            return [isinstance(value, str) and value in strings
+                    for value in values]
+        return [self.run_validators(value) for value in values]
 
 
 class FileField(TextField):
-    """File field"""
+    """File field, stores the file on folder_for_files and its path on the DB.
+
+    python_value() returns a FileReference, the file is not opened nor read
+    until its content is used, saving a FileReference again does not copy.
+
+    storage="sha256" is content-addressed, files are streamed in chunks while
+    hashed and stored once on folder_for_files/ab/cd/<sha256>, duplicates
+    are not stored again, the DB stores "<sha256>:<size>" instead of a path.
+
+    storage="name" with fan_out=2 stores on folder_for_files/ab/cd/<name>,
+    ab/cd from the hash of the name, to keep directories small.
+    Files are written to a temp file and renamed over a name claimed with
+    O_EXCL, concurrent workers saving the same name never overwrite.
 
-    def __init__(self, folder_for_files="peewee_files\\", *args, **kwargs):
+    workers=4 copies the files on a bounded pool of 4 background threads,
+    db_value() returns the destination path at once, file objects must stay
+    open until flush(), call flush() or await writer before the commit."""
+    storages = ("name", "sha256")
+
+    def __init__(self, folder_for_files="peewee_files\\", storage: str="name",
+                 fan_out: int=0, workers: int=0, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        if storage not in self.storages:
+            raise ValueError(f"""{self.__class__.__name__} 'storage' argument
+            is not valid (valid values must be one of {self.storages}):
+            {storage}.""")
+        if workers and storage != "name":
+            raise ValueError(f"""{self.__class__.__name__} 'workers' argument
+            needs the path before the copy (valid 'storage' must be "name"):
+            {storage}.""")
         self.folder_for_files = folder_for_files
+        self.storage = storage
+        self.fan_out = int(fan_out)
+        self.writer = BackgroundWriter(workers) if workers else None
         if os.path.exists(self.folder_for_files) is False:
             os.mkdir(self.folder_for_files)
 
     def db_value(self, path_or_bytesio):
-        if isinstance(path_or_bytesio, str):
+        if self.storage == "sha256":
+            return self.db_value_sha256(path_or_bytesio)
+
+        if isinstance(path_or_bytesio, FileReference):
+            file_path = path_or_bytesio.file_path  # Already stored.
+
+        elif isinstance(path_or_bytesio, str):
             file_name = os.path.basename(path_or_bytesio)
-            file_path = self.gen_path_for_file(file_name)
-            shutil.copyfile(path_or_bytesio, file_path)
+            file_path = self.store(path_or_bytesio, file_name)
 
         elif isinstance(path_or_bytesio, io.IOBase):
-            file_name = self.get_file_name(path_or_bytesio)
-            file_path = self.gen_path_for_file(file_name)
-
-            with open(file_path, "wb") as f:
-                f.write(path_or_bytesio.read())
+            file_name = (self.get_file_name(path_or_bytesio) or
+                         secrets.token_hex(16))  # Anonymous like BytesIO.
+            file_path = self.store(path_or_bytesio, file_name)
 
         else:
             file_path = None
 
         return file_path
 
+    def store(self, path_or_bytesio, file_name: str) -> str:
+        if self.writer is None:
+            return store_by_name(path_or_bytesio, self.folder_for_files,
+                                 file_name, self.fan_out)
+        file_path = reserve_by_name(self.folder_for_files, file_name,
+                                    self.fan_out)
+        self.writer.submit(fill_path, path_or_bytesio, file_path)
+        return file_path
+
+    def flush(self, timeout: float=None):
+        """Wait for the background copies, raise the first error if any."""
+        if self.writer is not None:
+            self.writer.flush(timeout)
+
+    def db_value_sha256(self, path_or_bytesio):
+        if isinstance(path_or_bytesio, FileReference) and path_or_bytesio.digest:
+            return f"{path_or_bytesio.digest}:{path_or_bytesio.size}"
+
+        if isinstance(path_or_bytesio, (str, os.PathLike, io.IOBase)):
+            digest, size, _ = store_content_addressed(
+                path_or_bytesio, self.folder_for_files)
+            return f"{digest}:{size}"
+
+        return None
+
     def python_value(self, value):
-        if value is not None:
-            file_path = value
-            with open(value, "rb") as value:
-                value.bytecode = value.read()
+        if value is not None and self.storage == "sha256":
+            digest, size = value.split(":")
+            value = FileReference(
+                content_address_path(self.folder_for_files, digest),
+                digest=digest, size=int(size))
 
-            value.file_path = file_path
+        elif value is not None:
+            value = FileReference(value)
 
         return value
 
     def gen_path_for_file(self, file_name, file_id=1):
+        """Return a free path for file_name, racy, db_value uses O_EXCL."""
         path = os.path.join(self.folder_for_files, file_name)
-        if os.path.exists(path):
-            file_name_without_extension_ = os.path.splitext(file_name)[0]
-            file_extension = os.path.splitext(file_name)[1]
+        file_name_without_extension_, file_extension = os.path.splitext(file_name)
+        while os.path.exists(path):
             _file_name = f"{file_name_without_extension_}_{file_id}{file_extension}"
             path = os.path.join(self.folder_for_files, _file_name)
-            if os.path.exists(path):
-                return self.gen_path_for_file(file_name, file_id=file_id+1)
+            file_id += 1
 
         return path
 
@@ -1187,14 +2174,217 @@ class FileField(TextField):
         return response
 
 
+def model_database(field):
+    """Return the database of the Model of the field, None if not known."""
+    database = getattr(getattr(field, "model", None), "_meta", None)
+    database = getattr(database, "database", None)
+    return getattr(database, "obj", database)  # Unwrap DatabaseProxy.
+
+
+def is_postgresql(field) -> bool:
+    """Return True if the Model of the field is bound to a PostgreSQL DB."""
+    return isinstance(model_database(field), PostgresqlDatabase)
+
+
+def companion_fields(model) -> list:
+    """Return the fields of the Model that write a 2nd companion column."""
+    return [field for field in model._meta.sorted_fields
+            if getattr(field, "companion_name", None)]
+
+
+def row_keys(row: dict, field) -> list:
+    """Return the keys of row naming field, the Field, its name or column."""
+    return [key for key in row if key is field or (isinstance(key, str) and
+            key in (field.name, field.column_name))]
+
+
+def split_companions(model, row):
+    """Return row with the 2 column values also on their companion column.
+
+    A value of a field with a companion column, like a tuple, is split by
+    field.split() into (value, companion value), plain values are kept."""
+    if not isinstance(row, dict):
+        return row  # A query, not data.
+    for field in companion_fields(model):
+        keys = row_keys(row, field)
+        split = field.split(row[keys[0]]) if keys else None
+        if split is None:
+            continue
+        companion = model._meta.fields[field.companion_name]
+        drop = keys + row_keys(row, companion)
+        row = {key: value for key, value in row.items()
+               if not any(key is dropped for dropped in drop)}
+        row[field], row[companion] = split
+    return row
+
+
+def split_companions_many(model, rows, fields=None):
+    """Return rows and fields of insert_many() with the companion columns."""
+    if fields is not None:
+        fields = [getattr(model, field) if isinstance(field, str) else field
+                  for field in fields]
+        indexes = [(index, field) for index, field in enumerate(fields)
+                   if getattr(field, "companion_name", None) and not any(
+                       other.name == field.companion_name for other in fields)]
+        fields += [model._meta.fields[field.companion_name]
+                   for _, field in indexes]
+    else:
+        indexes = []
+
+    def split_row(row):
+        if isinstance(row, dict):
+            return split_companions(model, row)
+        row, companions = list(row), []
+        for index, field in indexes:
+            split = field.split(row[index])
+            row[index], companion = split or (row[index], None)
+            companions.append(companion)
+        return row + companions
+
+    if isinstance(rows, (list, tuple)):
+        return [split_row(row) for row in rows], fields
+    return map(split_row, rows), fields
+
+
+def write_companions(model):
+    """Make Model insert(), insert_many() and update() write the companion
+    columns like the accessors do, once per Model and its subclasses."""
+    if getattr(model.insert_many, "writes_companions", False):
+        return
+    normalize_data = model._normalize_data.__func__
+    insert_many = model.insert_many.__func__
+
+    def _normalize_data(cls, data, kwargs):
+        return split_companions(cls, normalize_data(cls, data, kwargs))
+
+    def insert_many_companions(cls, rows, fields=None):
+        return insert_many(cls, *split_companions_many(cls, rows, fields))
+
+    insert_many_companions.writes_companions = True
+    model._normalize_data = classmethod(_normalize_data)
+    model.insert_many = classmethod(insert_many_companions)
+
+
+def json_path_sqlite(keys: tuple) -> str:
+    """Return a JSON path like $."a"."b"[0] for SQLite json_extract()."""
+    return "$" + "".join(
+        f"[{key}]" if isinstance(key, int) else '."{}"'.format(
+            str(key).replace('"', '\\"')) for key in keys)
+
+
+def json_path_postgresql(keys: tuple) -> str:
+    """Return a text[] literal like {"a","b","0"} for PostgreSQL jsonb_set."""
+    return "{%s}" % ",".join('"{}"'.format(
+        str(key).replace("\\", "\\\\").replace('"', '\\"')) for key in keys)
+
+
+class JSONPath(ColumnBase):
+    """Query expression for a sub-key of a JSONField, see JSONField.path().
+
+    On the SELECT list the JSON of the fragment is selected (-> on
+    PostgreSQL and SQLite >= 3.38) and decoded once, so a "123" or "null"
+    string is never mistaken for a number or null. On where() and
+    order_by() it is the SQL value (->> and json_extract()), as_json()
+    compares the JSON text instead. ->> is text on PostgreSQL, compare and
+    sort numbers with cast("numeric"), it casts the SQL value everywhere.
+    Only the fragment is transferred."""
+
+    def __init__(self, field, keys: tuple, as_json: bool=False,
+                 as_type: str=None):
+        super().__init__()
+        if not keys:
+            raise ValueError(f"""{self.__class__.__name__} requires at least
+            1 key (valid keys must be str or int): {keys}.""")
+        self.field = field
+        self.keys = tuple(keys)
+        self._as_json = bool(as_json)
+        self._as_type = as_type
+        self._converter = self.python_value  # Used by peewee on select().
+
+    def as_json(self, as_json: bool=True):
+        return JSONPath(self.field, self.keys, as_json)
+
+    def cast(self, as_type: str):
+        """Query, the SQL value cast to as_type, eg. path("total").cast("numeric")."""
+        return JSONPath(self.field, self.keys, as_type=as_type)
+
+    def python_value(self, value):
+        if self._as_type:
+            return value  # Typed by the database driver, not JSON.
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            return self.field.python_value(value)  # Always JSON, see __sql__.
+        return value
+
+    def __sql__(self, ctx):
+        if self._as_type:
+            self.sql_value(ctx.literal("CAST("), as_json=False)
+            return ctx.literal(f" AS {self._as_type})")
+        selected = (ctx.scope == SCOPE_SOURCE and not ctx.state.in_expr and
+                    not ctx.state.in_function)  # SELECT list, not inside.
+        return self.sql_value(ctx, self._as_json or selected)
+
+    def sql_value(self, ctx, as_json: bool):
+        if is_postgresql(self.field):
+            ctx.literal("CAST((" if as_json else "(").sql(self.field)
+            for key in self.keys[:-1]:
+                ctx.literal("->").sql(Value(key, converter=False))
+            ctx.literal("->" if as_json else "->>")
+            ctx.sql(Value(self.keys[-1], converter=False))
+            return ctx.literal(") AS text)" if as_json else ")")
+        path = Value(json_path_sqlite(self.keys), converter=False)
+        if not as_json:
+            return ctx.sql(fn.json_extract(self.field, path))
+        if __sqlite_version__ >= (3, 38, 0):
+            return ctx.sql(NodeList((self.field, SQL("->"), path)))
+        # json_extract() returns true and false as 1 and 0, json_type() not.
+        return ctx.sql(Case(fn.json_type(self.field, path), (
+            ("true", SQL("'true'")), ("false", SQL("'false'"))),
+            fn.json_quote(fn.json_extract(self.field, path))))
+
+
 class JSONField(TextField):
-    """json field"""
+    """JSON Field, stores list or dict as JSON text.
+
+    The codec can be "orjson", "ujson", "json" or any JSONCodec, per field or
+    globally with set_json_codec(), default is ujson if installed else json.
+    orjson is opt-in, it rejects non-str dict keys and ints over 64 bits.
+    With binary=True a binary codec returns bytes without decoding to str,
+    use it only when the database driver accepts bytes for the column.
+    python_value() takes str, bytes or memoryview straight from the driver.
+
+    JSON strings are checked with validate="full" (parsed), "shallow" (only
+    the outer delimiters, the database parses it anyway) or None (trusted).
+    jsonb=True uses the PostgreSQL jsonb type, GIN indexed when index=True,
+    and enables contains() and contained_by() queries (@> and <@).
+    With a Compressor it is stored compressed as BLOB, then path(), patch()
+    and contains() can not be used on it."""
 
     field_type = "json"
+    validate_modes = ("full", "shallow", None)
 
-    def __init__(self, ensure_ascii=False, *args, **kwargs):
+    def __init__(self, ensure_ascii=False, codec=None, binary: bool=False,
+                 validate: str="full", jsonb: bool=False, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        if validate not in self.validate_modes:
+            raise ValueError(f"""{self.__class__.__name__} 'validate' argument
+            is not valid (valid values must be one of
+            {self.validate_modes}): {validate}.""")
         self.ensure_ascii = ensure_ascii
+        get_json_codec(codec)  # Fail early if the codec is not installed.
+        self.codec = codec
+        self.binary = bool(binary)
+        self.validate = validate
+        self.jsonb = bool(jsonb)
+        if self.jsonb and self.compressor:
+            raise ValueError(f"""{self.__class__.__name__} 'jsonb' and
+            'compressor' arguments can not be used together (valid values
+            must be only 1 of them): {jsonb}, {self.compressor}.""")
+        if self.jsonb:
+            self.field_type = "jsonb"
+            self.index_type = self.index_type or "GIN"
+
+    def get_codec(self) -> JSONCodec:
+        return get_json_codec(self.codec)
 
     def db_value(self, value):
         if value is None:
@@ -1204,30 +2394,143 @@ class JSONField(TextField):
             value = "{}"
 
         elif isinstance(value, list) or isinstance(value, dict):
-            ensure_ascii = self.ensure_ascii
-            value = json.dumps(value, ensure_ascii=ensure_ascii)  # list -> str
+            codec = self.get_codec()
+            value = codec.dumps(value, ensure_ascii=self.ensure_ascii)
+            if codec.binary and not self.binary:
+                value = value.decode("utf-8")  # bytes -> str
+
+        elif self.validate == "shallow" and not self.is_json_shallow(value):
+            raise ValueError(f"""{self.__class__.__name__} Value is not a JSON
+            Object or Array (valid values must start and end with {{}} or [],
+            checked with validate='shallow'): {value[:80]!r}.""")
 
-        elif not self.is_json(value):
+        elif self.validate == "full" and not self.is_json(value):
             raise ValueError
 
-        return value
+        return self.compress(value)
 
     def python_value(self, value):
-        if not value is None:
-            value = json.loads(value)
+        if self.compressor and value is not None:
+            value = self.compressor.decompress(value)  # Still bytes.
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            codec = self.get_codec()
+            if isinstance(value, memoryview) and not codec.binary:
+                value = value.tobytes()  # memoryview -> bytes, not decoded.
+            value = codec.loads(value)
         return value
 
-    @staticmethod
-    def is_json(json_string):
+    def json_text(self, value) -> str:
+        """Return value as JSON str for query parameters, never as bytes."""
+        value = self.get_codec().dumps(value, ensure_ascii=self.ensure_ascii)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def path(self, *keys) -> JSONPath:
+        """Query, only the sub-key at keys, eg. Model.data.path("a", 0)."""
+        return JSONPath(self, keys)
+
+    def patch(self, changes: dict, remove: tuple=(), document=None):
+        """Query, UPDATE only the changed sub-keys with jsonb_set/json_set.
+
+        changes maps a key or a tuple of keys to its new value, remove has
+        the keys or tuples of keys to delete, see JSONField.diff().
+        If document (the whole new value) is given and is smaller than
+        the patch, the whole document is written instead.
+        eg. Model.update({Model.data: Model.data.patch({("a", 0): 1})})."""
+        changes = {(k if isinstance(k, tuple) else (k, )): v
+                   for k, v in changes.items()}
+        remove = tuple(k if isinstance(k, tuple) else (k, ) for k in remove)
+
+        if () in changes:  # The root itself changed, nothing to patch.
+            return changes[()]
+
+        changes = {k: self.json_text(v) for k, v in changes.items()}
+
+        if document is not None:
+            patch_size = sum(len(json_path_sqlite(keys)) + len(value)
+                             for keys, value in changes.items())
+            patch_size += sum(len(json_path_sqlite(keys)) for keys in remove)
+            if patch_size >= len(self.json_text(document)):
+                return document  # Full rewrite is smaller than the patch.
+
+        if is_postgresql(self):
+            node = self if self.jsonb else Cast(self, "jsonb")
+            for keys in remove:
+                node = Expression(node, "#-", Cast(Value(
+                    json_path_postgresql(keys), converter=False), "text[]"))
+            for keys, value in changes.items():
+                node = fn.jsonb_set(
+                    node,
+                    Cast(Value(json_path_postgresql(keys), converter=False),
+                         "text[]"),
+                    Cast(Value(value, converter=False), "jsonb"), True)
+            return node if self.jsonb else Cast(node, "json")
+
+        node = self
+        if remove:
+            node = fn.json_remove(node, *(Value(
+                json_path_sqlite(keys), converter=False) for keys in remove))
+        if changes:
+            arguments = []
+            for keys, value in changes.items():
+                arguments.append(Value(json_path_sqlite(keys), converter=False))
+                arguments.append(fn.json(Value(value, converter=False)))
+            node = fn.json_set(node, *arguments)
+        return node
+
+    @classmethod
+    def diff(cls, old, new, keys: tuple=()) -> tuple:
+        """Return (changes, remove) that turn old into new, for patch()."""
+        changes, remove = {}, []
+        if isinstance(old, dict) and isinstance(new, dict):
+            remove += [keys + (key, ) for key in old if key not in new]
+            for key, value in new.items():
+                if key not in old:
+                    changes[keys + (key, )] = value
+                elif old[key] != value:
+                    sub_changes, sub_remove = cls.diff(
+                        old[key], value, keys + (key, ))
+                    changes.update(sub_changes)
+                    remove += sub_remove
+        elif old != new:
+            changes[keys] = new  # Scalars and Arrays are replaced whole.
+        return changes, tuple(remove)
+
+    def contains(self, other):
+        """Query, jsonb column contains other (@>), uses a GIN index.
+
+        Without jsonb=True it is the LIKE '%other%' of every peewee Field,
+        on the JSON text, other is not converted to JSON by db_value()."""
+        if not self.jsonb:
+            pattern = str(other).replace("\\", "\\\\").replace(
+                "_", "\\_").replace("%", "\\%")
+            return Expression(self, OP.ILIKE, NodeList((
+                Value(f"%{pattern}%", converter=False), SQL("ESCAPE"),
+                Value("\\", converter=False))))
+        return Expression(self, "@>", Cast(
+            Value(self.json_text(other), converter=False), "jsonb"))
+
+    def contained_by(self, other):
+        """Query, jsonb column is contained by other (<@), uses GIN index."""
+        return Expression(self, "<@", Cast(
+            Value(self.json_text(other), converter=False), "jsonb"))
+
+    def is_json(self, json_string):
         try:
-            json.loads(json_string)
+            self.get_codec().loads(json_string)
             response = True
         except TypeError:
             response = False
 
         return response
 
-
+    @staticmethod
+    def is_json_shallow(json_string) -> bool:
+        """O(1) check of the outer delimiters, no parsing at all."""
+        if isinstance(json_string, (bytes, bytearray, memoryview)):
+            json_string = bytes(json_string).strip()
+            return json_string[:1] + json_string[-1:] in (b"{}", b"[]")
+        json_string = json_string.strip()
+        return json_string[:1] + json_string[-1:] in ("{}", "[]")
 
 
 # Most Wanted Fields:
@@ -9,10 +9,13 @@ import re
 
 from peewee import CharField
 
+from .regex_fields import _CompactDigits
 
-class ARCUITField(CharField):
+
+class ARCUITField(_CompactDigits, CharField):
     """CharField clone but only accepts Argentine CUIT, also extracts DNI."""
     max_length = 14  # 11 Digits + 2 Hyphens.
+    digits_format = "###########"  # Stored without Hyphens.
 
     def db_value(self, value: str) -> str:
         if value and isinstance(value, str):
@@ -23,7 +26,7 @@ class ARCUITField(CharField):
                 (valid values must match Regex {cuit_code_regex}): {value}.""")
             value = value.replace("-", "")
 
-        return value
+        return super().db_value(value)
 
     @staticmethod
     def cuit2dni(value: str) -> int:  # Helper, takes CUIT returns DNI.
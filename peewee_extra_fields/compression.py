@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Extra Fields for Peewee ORM. Compression for big Field values lives here.
+
+Stored values are 1 header byte + payload, the header has the algorithm,
+0x80 flags a shared dictionary and is followed by 4 bytes of its CRC32."""
+
+
+import lzma
+import re
+import struct
+import zlib
+
+from collections import Counter
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+RAW, ZLIB, LZMA, ZSTD, DICTIONARY = 0x00, 0x01, 0x02, 0x03, 0x80
+ALGORITHMS = {"zlib": ZLIB, "lzma": LZMA, "zstd": ZSTD}
+
+# JSON keys and strings, XML tags and attributes, words and numbers.
+_TOKENS = re.compile(rb'"[^"\\]{1,64}"\s*:?|</?[\w:.-]{1,64}[ >]?|'
+                     rb'[\w:.-]{1,64}="|\w{3,64}')
+
+
+class Compressor(object):
+    """Compress Field values at or above threshold bytes, keep small ones raw.
+
+    algorithm is "zlib", "lzma" or "zstd" (needs the zstandard package).
+    dictionary is an optional shared dictionary from train_dictionary(),
+    for zlib and zstd only, changing it makes old values unreadable."""
+
+    def __init__(self, algorithm: str="zlib", level: int=None,
+                 threshold: int=1_024, dictionary: bytes=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"""{self.__class__.__name__} 'algorithm' is not
+            valid (valid values must be one of {tuple(ALGORITHMS)}):
+            {algorithm}.""")
+        if algorithm == "zstd" and not zstandard:
+            raise ValueError(
+                f'{self.__class__.__name__} Module not found: zstandard.')
+        if dictionary and algorithm == "lzma":
+            raise ValueError(f"""{self.__class__.__name__} 'dictionary' is not
+            supported by lzma (valid algorithms for a dictionary must be zlib
+            or zstd): {algorithm}.""")
+        self.algorithm = algorithm
+        self.level = level
+        self.threshold = int(threshold)
+        self.dictionary = bytes(dictionary) if dictionary else None
+        self.header = ALGORITHMS[algorithm]
+        self.dictionary_id = b""
+        if self.dictionary:
+            self.header |= DICTIONARY
+            self.dictionary_id = struct.pack(">I", zlib.crc32(self.dictionary))
+        if algorithm == "zstd":
+            zstd_dict = (zstandard.ZstdCompressionDict(self.dictionary)
+                         if self.dictionary else None)
+            self._zstd_compressor = zstandard.ZstdCompressor(
+                level=3 if level is None else level, dict_data=zstd_dict)
+            self._zstd_decompressor = zstandard.ZstdDecompressor(
+                dict_data=zstd_dict)
+
+    def __repr__(self) -> str:
+        return (f"{self.__class__.__name__}({self.algorithm!r}, "
+                f"threshold={self.threshold}, "
+                f"dictionary={self.dictionary_id.hex() or None})")
+
+    def compress(self, value):
+        """Return str or bytes value compressed as bytes, None is None."""
+        if value is None:
+            return value
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if len(value) < self.threshold:
+            return bytes((RAW, )) + value
+        if self.algorithm == "zlib":
+            level = -1 if self.level is None else self.level
+            if self.dictionary:
+                compressor = zlib.compressobj(level, zdict=self.dictionary)
+                payload = compressor.compress(value) + compressor.flush()
+            else:
+                payload = zlib.compress(value, level)
+        elif self.algorithm == "lzma":
+            payload = lzma.compress(value, preset=self.level)
+        else:
+            payload = self._zstd_compressor.compress(value)
+        if len(payload) + 5 >= len(value):  # Not worth it, keep it raw.
+            return bytes((RAW, )) + value
+        return bytes((self.header, )) + self.dictionary_id + payload
+
+    def decompress(self, value) -> bytes:
+        """Return the original bytes of a compressed value, None is None."""
+        if value is None:
+            return value
+        value = memoryview(value)  # Slices below are zero-copy.
+        header, payload = value[0], value[1:]
+        if header == RAW:
+            return payload.tobytes()
+        if header & DICTIONARY:
+            if payload[:4] != self.dictionary_id:
+                raise ValueError(f"""{self.__class__.__name__} Value was
+                compressed with another dictionary (valid values must use the
+                dictionary {self.dictionary_id.hex()}):
+                {payload[:4].hex()}.""")
+            payload = payload[4:]
+        algorithm = header & ~DICTIONARY
+        if algorithm == ZLIB:
+            if self.dictionary and header & DICTIONARY:
+                decompressor = zlib.decompressobj(zdict=self.dictionary)
+                return decompressor.decompress(payload) + decompressor.flush()
+            return zlib.decompress(payload)
+        if algorithm == LZMA:
+            return lzma.decompress(payload)
+        if algorithm == ZSTD and zstandard:
+            if header & DICTIONARY or self.algorithm == "zstd":
+                return self._zstd_decompressor.decompress(payload)
+            return zstandard.ZstdDecompressor().decompress(payload)
+        raise ValueError(f"""{self.__class__.__name__} Value header is not
+        valid or its module is not installed (valid headers must be one of
+        {ALGORITHMS}): {header}.""")
+
+    @staticmethod
+    def train_dictionary(samples, size: int=16_384,
+                         algorithm: str="zlib") -> bytes:
+        """Return a shared dictionary of size bytes trained from samples.
+
+        samples is an iterable of str or bytes, eg. some rows of the table.
+        zstd uses its own trainer, zlib uses the most common tokens."""
+        samples = [sample.encode("utf-8") if isinstance(sample, str)
+                   else bytes(sample) for sample in samples if sample]
+        if algorithm == "zstd":
+            if not zstandard:
+                raise ValueError('Compressor Module not found: zstandard.')
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        counter = Counter()
+        for sample in samples:
+            counter.update(_TOKENS.findall(sample))
+        dictionary, length = [], 0
+        for token, count in sorted(counter.items(), reverse=True,
+                                   key=lambda item: item[1] * len(item[0])):
+            if count < 2 or length + len(token) > size:
+                continue
+            dictionary.append(token)
+            length += len(token)
+        # zlib finds matches nearer to the end of the dictionary cheaper.
+        return b"".join(reversed(dictionary))
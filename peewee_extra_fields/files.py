@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Extra Fields for Peewee ORM. Helpers for FileField stored files live here."""
+
+
+import errno
+import hashlib
+import io
+import itertools
+import mmap
+import os
+import secrets
+import shutil
+import socket
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from email.utils import formatdate, parsedate_to_datetime
+
+
+CHUNK_SIZE = 1_048_576
+SENDFILE_MAX = 0x7FFFF000  # Linux sends at most this per call.
+
+
+def parse_range(header: str, size: int):
+    """Return (start, stop) of a single "bytes=" HTTP Range header.
+
+    None means serve it all (no header, other units or multiple ranges),
+    raises ValueError if it can not be satisfied (HTTP 416)."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:  # Suffix, the last N bytes.
+            length = int(last)
+            if length <= 0:
+                raise ValueError(f"Range is not satisfiable: {header}.")
+            return max(size - length, 0), size
+        start = int(first)
+        stop = min(int(last) + 1, size) if last else size
+    except (TypeError, ValueError):
+        raise ValueError(f"Range is not valid: {header}.")
+    if start >= size or stop <= start:
+        raise ValueError(f"Range is not satisfiable: {header}.")
+    return start, stop
+
+
+class FileReference(os.PathLike):
+    """Lazy reference to a file stored by FileField, returned on select().
+
+    Only the path is kept, no file handle is opened and nothing is read until
+    the content is used, size and stat() do not read the content at all.
+    Works anywhere a path works, eg. open(reference) or shutil.copy()."""
+
+    __slots__ = ("file_path", "digest", "_size", "_stat", "_bytecode")
+    chunk_size = 65_536
+
+    def __init__(self, file_path, digest: str=None, size: int=None):
+        self.file_path = os.fspath(file_path)
+        self.digest = digest  # SHA-256 hex, only on content-addressed storage.
+        self._size = size
+        self._stat = None
+        self._bytecode = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.file_path!r})"
+
+    def __str__(self) -> str:
+        return self.file_path
+
+    def __fspath__(self) -> str:
+        return self.file_path
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (str, os.PathLike)):
+            return self.file_path == os.fspath(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.file_path)
+
+    @property
+    def name(self) -> str:
+        return self.file_path
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.file_path)
+
+    def stat(self, refresh: bool=False) -> os.stat_result:
+        """Return os.stat() of the file, cached, without opening it."""
+        if self._stat is None or refresh:
+            self._stat = os.stat(self.file_path)
+        return self._stat
+
+    @property
+    def size(self) -> int:
+        return self.stat().st_size if self._size is None else self._size
+
+    @property
+    def mtime(self) -> float:
+        return self.stat().st_mtime
+
+    def open(self, mode: str="rb", buffering: int=-1):
+        """Return a new file object, the caller must close it."""
+        return open(self.file_path, mode, buffering)
+
+    def read(self) -> bytes:
+        """Return the whole content, read from disk on every call."""
+        with open(self.file_path, "rb") as file_object:
+            return file_object.read()
+
+    @property
+    def bytecode(self) -> bytes:
+        """The whole content as bytes, read on first access and cached."""
+        if self._bytecode is None:
+            self._bytecode = self.read()
+        return self._bytecode
+
+    def iter_chunks(self, chunk_size: int=None):
+        """Yield the content as bytes chunks, only 1 chunk in memory."""
+        with open(self.file_path, "rb") as file_object:
+            for chunk in iter(
+                    lambda: file_object.read(chunk_size or self.chunk_size),
+                    b""):
+                yield chunk
+
+    @property
+    def etag(self) -> str:
+        """Strong HTTP ETag from the SHA-256 or the size and mtime."""
+        if self.digest:
+            return f'"{self.digest}"'
+        stat = self.stat()
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    @property
+    def last_modified(self) -> str:
+        """HTTP Last-Modified date of the file."""
+        return formatdate(self.mtime, usegmt=True)
+
+    def not_modified(self, if_none_match: str=None,
+                     if_modified_since: str=None) -> bool:
+        """Return True if the client copy is fresh (HTTP 304), no read."""
+        if if_none_match:
+            tags = (tag.strip() for tag in if_none_match.split(","))
+            return if_none_match.strip() == "*" or self.etag in (
+                tag[2:] if tag.startswith("W/") else tag for tag in tags)
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+    def http_response(self, range_header: str=None, if_none_match: str=None,
+                      if_modified_since: str=None, if_range: str=None) -> tuple:
+        """Return (status, headers, start, stop) to serve the file over HTTP.
+
+        Arguments are the request headers, only stat() is used, send the
+        body with sendfile(out, start, stop) or iter_range(start, stop)."""
+        size, headers = self.size, {"Accept-Ranges": "bytes", "ETag": self.etag,
+                                    "Last-Modified": self.last_modified}
+        if self.not_modified(if_none_match, if_modified_since):
+            return 304, headers, 0, 0
+        if if_range and if_range not in (self.etag, self.last_modified):
+            range_header = None  # Changed since, send it all.
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return 416, headers, 0, 0
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return 200, headers, 0, size
+        start, stop = byte_range
+        headers["Content-Length"] = str(stop - start)
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        return 206, headers, start, stop
+
+    def iter_range(self, start: int=0, stop: int=None, chunk_size: int=None):
+        """Yield bytes chunks of the range, eg. as a WSGI response body."""
+        stop = self.size if stop is None else stop
+        chunk_size = chunk_size or self.chunk_size
+        with open(self.file_path, "rb") as file_object:
+            for offset in range(start, stop, chunk_size):
+                if hasattr(os, "pread"):
+                    yield os.pread(file_object.fileno(),
+                                   min(chunk_size, stop - offset), offset)
+                else:  # Windows.
+                    file_object.seek(offset)
+                    yield file_object.read(min(chunk_size, stop - offset))
+
+    def sendfile(self, out, start: int=0, stop: int=None) -> int:
+        """Send the range to a socket, a fd or a file object, return bytes.
+
+        The content is not copied through Python memory, sockets and fds use
+        os.sendfile(), else it writes slices of a mmap of the file."""
+        stop = self.size if stop is None else min(stop, self.size)
+        if stop <= start:
+            return 0
+        with open(self.file_path, "rb") as file_object:
+            if isinstance(out, socket.socket):
+                return out.sendfile(file_object, start, stop - start)
+            try:
+                out_fd = out if isinstance(out, int) else out.fileno()
+            except (AttributeError, OSError, ValueError):
+                out_fd = None
+            sent = 0
+            if out_fd is not None and hasattr(os, "sendfile"):
+                if not isinstance(out, int):
+                    out.flush()  # Keep the order of buffered writes.
+                try:
+                    while start + sent < stop:
+                        count = os.sendfile(out_fd, file_object.fileno(),
+                                            start + sent,
+                                            min(stop - start - sent, SENDFILE_MAX))
+                        if not count:
+                            break
+                        sent += count
+                    return sent
+                except OSError as error:
+                    if sent or error.errno not in (errno.EINVAL, errno.ENOSYS,
+                                                   errno.EOPNOTSUPP):
+                        raise
+            with mmap.mmap(file_object.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped, \
+                    memoryview(mapped) as view:
+                while start + sent < stop:
+                    with view[start + sent:min(start + sent + CHUNK_SIZE,
+                                               stop)] as chunk:
+                        written = (os.write(out_fd, chunk) if out_fd is not None
+                                   else out.write(chunk))
+                        sent += len(chunk) if written is None else written
+            return sent
+
+    @contextmanager
+    def mmap(self):
+        """Context manager with a read-only mmap of the content."""
+        with open(self.file_path, "rb") as file_object:
+            if not os.fstat(file_object.fileno()).st_size:
+                yield memoryview(b"")  # Empty files can not be mmap-ed.
+                return
+            mapped = mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+
+def content_address_path(folder: str, digest: str) -> str:
+    """Return the path of a SHA-256 hex digest, like folder/ab/cd/abcd..."""
+    return os.path.join(folder, digest[:2], digest[2:4], digest)
+
+
+def open_source(source):
+    """Return a context manager with a binary file object for source.
+
+    source is a path or a file object, file objects are not closed."""
+    if isinstance(source, io.IOBase):
+        return nullcontext(source)
+    return open(source, "rb")
+
+
+def temp_file(folder: str) -> tuple:
+    """Return (fd, path) of a new hidden temporary file on folder.
+
+    Created with O_EXCL and the umask permissions, unlike tempfile 0o600."""
+    while True:
+        path = os.path.join(folder, f".upload-{secrets.token_hex(8)}")
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY |
+                           getattr(os, "O_BINARY", 0), 0o666), path
+        except FileExistsError:
+            continue
+
+
+def write_temp_file(source, folder: str, chunk_size: int=CHUNK_SIZE,
+                    fsync: bool=False) -> str:
+    """Copy source (a path or a file object) into a temp file on folder."""
+    handle, temp_path = temp_file(folder)
+    try:
+        if isinstance(source, io.IOBase):
+            with os.fdopen(handle, "wb") as temp:
+                shutil.copyfileobj(source, temp, chunk_size)
+                if fsync:
+                    temp.flush()
+                    os.fsync(temp.fileno())
+        else:
+            os.close(handle)
+            shutil.copyfile(source, temp_path)  # Uses the OS fast copy.
+            if fsync:
+                handle = os.open(temp_path, os.O_RDONLY)
+                try:
+                    os.fsync(handle)
+                finally:
+                    os.close(handle)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return temp_path
+
+
+def shard_folder(folder: str, file_name: str, fan_out: int=0) -> str:
+    """Return folder plus fan_out levels of 2 hex chars of the name hash."""
+    if not fan_out:
+        return folder
+    digest = hashlib.sha256(file_name.encode("utf-8")).hexdigest()
+    return os.path.join(folder, *(digest[i:i + 2]
+                                  for i in range(0, fan_out * 2, 2)))
+
+
+def claim_path(folder: str, file_name: str) -> str:
+    """Atomically create an empty file_name, name_1, name_2... on folder.
+
+    O_EXCL makes concurrent workers get different names, never overwrite."""
+    base, extension = os.path.splitext(file_name)
+    for file_id in itertools.count():
+        name = f"{base}_{file_id}{extension}" if file_id else file_name
+        path = os.path.join(folder, name)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+        except FileExistsError:
+            continue
+        return path
+
+
+def store_by_name(source, folder: str, file_name: str, fan_out: int=0,
+                  chunk_size: int=CHUNK_SIZE) -> str:
+    """Copy source into folder as file_name, return its path.
+
+    The content is copied to a temp file, then renamed over a name claimed
+    with O_EXCL, so concurrent writers can not overwrite each other."""
+    folder = shard_folder(folder, file_name, fan_out)
+    os.makedirs(folder, exist_ok=True)
+    temp_path = write_temp_file(source, folder, chunk_size)
+    try:
+        path = claim_path(folder, file_name)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    os.replace(temp_path, path)  # Atomic, readers never see partial files.
+    return path
+
+
+def reserve_by_name(folder: str, file_name: str, fan_out: int=0) -> str:
+    """Claim and return the path store_by_name() would use, without content."""
+    folder = shard_folder(folder, file_name, fan_out)
+    os.makedirs(folder, exist_ok=True)
+    return claim_path(folder, file_name)
+
+
+def fill_path(source, path: str, chunk_size: int=CHUNK_SIZE,
+              fsync: bool=True) -> str:
+    """Copy source over the reserved path atomically, remove it on errors."""
+    try:
+        temp_path = write_temp_file(source, os.path.dirname(path),
+                                    chunk_size, fsync)
+    except BaseException:
+        os.unlink(path)  # Missing is more honest than an empty file.
+        raise
+    os.replace(temp_path, path)
+    return path
+
+
+class BackgroundWriter(object):
+    """Bounded thread pool that copies FileField files in the background.
+
+    submit() blocks only when max_pending copies are already queued.
+    flush() waits for every copy and raises the first error, await it on
+    asyncio code, eg. flush() before the commit of the transaction."""
+
+    def __init__(self, workers: int=4, max_pending: int=None):
+        self.executor = ThreadPoolExecutor(workers,
+                                           thread_name_prefix="FileField")
+        self.slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self.pending = set()
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (f"{self.__class__.__name__}(pending={len(self.pending)}, "
+                f"errors={len(self.errors)})")
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    def submit(self, function, *args):
+        """Run function(*args) on the pool, return its Future."""
+        self.slots.acquire()  # Backpressure, keeps memory and queue bounded.
+        try:
+            future = self.executor.submit(self._run, function, args)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self._lock:
+            self.pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _run(self, function, args):
+        try:
+            return function(*args)
+        except BaseException as error:  # Recorded before the Future is done.
+            with self._lock:
+                self.errors.append(error)
+            raise
+
+    def _done(self, future):
+        with self._lock:
+            self.pending.discard(future)
+        self.slots.release()
+
+    def _raise_errors(self):
+        with self._lock:
+            errors, self.errors = self.errors, []
+        if errors:
+            raise errors[0]
+
+    def flush(self, timeout: float=None):
+        """Wait for all the pending copies, raise the first error if any."""
+        with self._lock:
+            pending = tuple(self.pending)
+        wait(pending, timeout)
+        self._raise_errors()
+
+    async def wait(self):
+        """Like flush() but awaitable, the event loop is not blocked."""
+        import asyncio
+        with self._lock:
+            pending = tuple(self.pending)
+        if pending:
+            await asyncio.wait([asyncio.wrap_future(future)
+                                for future in pending])
+        self._raise_errors()
+
+    def shutdown(self):
+        self.flush()
+        self.executor.shutdown()
+
+
+def store_content_addressed(source, folder: str,
+                            chunk_size: int=CHUNK_SIZE) -> tuple:
+    """Stream source into folder while hashing it with SHA-256.
+
+    Returns (digest, size, path), identical content is stored only once,
+    a duplicate costs 1 stat() of its path, the directory is never listed."""
+    handle, temp_path = temp_file(folder)
+    sha256, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(handle, "wb") as temp, \
+                open_source(source) as source_file:
+            for chunk in iter(lambda: source_file.read(chunk_size), b""):
+                sha256.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        digest = sha256.hexdigest()
+        path = content_address_path(folder, digest)
+        try:
+            os.stat(path)  # Duplicate, already stored.
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)  # Atomic, same content if raced.
+        return digest, size, path
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Extra Fields for Peewee ORM. Blacklist and whitelist matching lives here.
+
+Exact and word matching are hash lookups (or a binary search on a mmap-ed
+MappedWordList), substring matching uses an Aho-Corasick automaton built
+once, from pyahocorasick if installed, else the pure Python one below."""
+
+
+import mmap
+import os
+import re
+
+from collections import deque
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+MODES = ("exact", "word", "substring")
+_WORDS = re.compile(r"\w+")
+
+
+class MappedWordList(object):
+    """Sorted word list file, 1 lowercase entry per line, mmap-ed read-only.
+
+    The pages are shared by every process that maps the file, so 200_000
+    entries cost no memory per worker, lookups are a binary search.
+    Create the file with MappedWordList.write(path, words)."""
+
+    def __init__(self, path: str):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as file_object:
+            size = os.fstat(file_object.fileno()).st_size
+            self._mmap = mmap.mmap(file_object.fileno(), 0,
+                                   access=mmap.ACCESS_READ) if size else b""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def __contains__(self, word) -> bool:
+        key, data = word.lower().encode("utf-8"), self._mmap
+        low, high = 0, len(data)
+        while low < high:
+            middle = (low + high) // 2
+            start = data.rfind(b"\n", 0, middle) + 1
+            end = data.find(b"\n", start)
+            end = len(data) if end == -1 else end
+            line = data[start:end]
+            if line == key:
+                return True
+            if line < key:
+                low = end + 1
+            else:
+                high = start
+        return False
+
+    def __iter__(self):
+        for line in bytes(self._mmap).splitlines():
+            if line:
+                yield line.decode("utf-8")
+
+    @staticmethod
+    def write(path: str, words) -> str:
+        """Write words sorted, unique and lowercase to path, atomically."""
+        lines = sorted({word.lower().encode("utf-8") for word in words if word})
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        with open(temp_path, "wb") as file_object:
+            file_object.write(b"\n".join(lines) + b"\n")
+        os.replace(temp_path, path)
+        return path
+
+
+class Automaton(object):
+    """Pure Python Aho-Corasick automaton, finds all words in 1 pass."""
+
+    def __init__(self, words):
+        goto, fail, output = [{}], [0], [()]
+        for word in words:
+            node = 0
+            for character in word:
+                child = goto[node].get(character)
+                if child is None:
+                    child = goto[node][character] = len(goto)
+                    goto.append({})
+                    fail.append(0)
+                    output.append(())
+                node = child
+            if word:
+                output[node] += (len(word), )
+        queue = deque(goto[0].values())
+        while queue:  # Breadth first, failure links of shorter prefixes first.
+            node = queue.popleft()
+            for character, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and character not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(character, 0)
+                output[child] += output[fail[child]]
+        self.goto, self.fail, self.output = goto, fail, output
+
+    def iter(self, text: str):
+        """Yield (start, end) of every word found in text."""
+        goto, fail, output, node = self.goto, self.fail, self.output, 0
+        for index, character in enumerate(text):
+            while node and character not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(character, 0)
+            for length in output[node]:
+                yield index + 1 - length, index + 1
+
+
+class WordMatcher(object):
+    """Matches a value against a word list, in exact, word or substring mode.
+
+    exact: the whole value is in the list.
+    word: any word or run of words of the value is in the list.
+    substring: any entry of the list is anywhere in the value."""
+
+    def __init__(self, words, mode: str="exact"):
+        if mode not in MODES:
+            raise ValueError(f"""{self.__class__.__name__} 'mode' argument is
+            not valid (valid values must be one of {MODES}): {mode}.""")
+        self.mode = mode
+        if isinstance(words, MappedWordList) and mode != "substring":
+            self.words = words  # Shared pages, nothing loaded.
+        else:
+            self.words = frozenset(word.lower() for word in words if word)
+        self.max_words = 1
+        if mode == "word":  # Entries of several words match runs of words.
+            if not isinstance(self.words, MappedWordList):
+                self.words = frozenset(" ".join(_WORDS.findall(word))
+                                       for word in self.words)
+            self.max_words = max((word.count(" ") + 1 for word in self.words),
+                                 default=1)
+        elif mode == "substring":
+            self.automaton = self.build_automaton(self.words)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(mode={self.mode!r})"
+
+    @staticmethod
+    def build_automaton(words):
+        if ahocorasick is None:
+            return Automaton(words)
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            automaton.add_word(word, len(word))
+        if len(automaton):
+            automaton.make_automaton()
+        return automaton
+
+    def __contains__(self, value: str) -> bool:
+        value = value.lower()
+        if self.mode == "exact":
+            return value in self.words
+        if self.mode == "substring":
+            if ahocorasick is not None and not len(self.automaton):
+                return False
+            return next(iter(self.automaton.iter(value)), None) is not None
+        words = _WORDS.findall(value)
+        for size in range(1, self.max_words + 1):
+            for index in range(len(words) - size + 1):
+                if " ".join(words[index:index + size]) in self.words:
+                    return True
+        return False
@@ -7,9 +7,73 @@
 
 import re
 
+from collections import Counter
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import is_not
+
 from peewee import CharField
 
 
+_NOT_DIGITS = re.compile(r"\D")
+
+
+class _CompactDigits(object):
+    """Opt-in compact storage, compact=True stores the digits as an integer.
+
+    digits_format is the canonical format, "#" are digits and the rest are
+    separators, leading zeros and separators are restored on read.
+    Integers sort like the fixed width strings, so indexes still work."""
+    digits_format = None
+
+    def __init__(self, *args, compact: bool=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compact = bool(compact)
+        if self.compact:
+            self.digits = self.digits_format.count("#")
+            self.field_type = "BIGINT" if self.digits > 9 else "INT"
+            groups, start = [], 0  # (separator, start, end) of each group.
+            for separator, group in re.findall(r"([^#]*)(#+)",
+                                               self.digits_format):
+                groups.append((separator, start, start + len(group)))
+                start += len(group)
+            self._groups = tuple(groups)
+            self._tail = self.digits_format[self.digits_format.rfind("#") + 1:]
+
+    def get_modifiers(self):
+        return None if self.compact else super().get_modifiers()
+
+    def db_value(self, value):
+        if not self.compact or value is None:
+            return super().db_value(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            digits = str(value).zfill(self.digits)
+            if value < 0 or len(digits) != self.digits:
+                raise ValueError(
+                    f"{self.__class__.__name__}: Value integer is out of range"
+                    f" (valid values must have {self.digits} digits): {value}.")
+            return self.db_value(self.format_digits(value))  # Validates it.
+        digits = _NOT_DIGITS.sub("", super().db_value(value))
+        if len(digits) != self.digits:
+            raise ValueError(
+                f"{self.__class__.__name__}: Value string is not valid!. "
+                f"(valid values must have {self.digits} digits): {value}.")
+        return int(digits)
+
+    def python_value(self, value):
+        if self.compact and isinstance(value, int):
+            value = self.format_digits(value)
+        return super().python_value(value)
+
+    def format_digits(self, value: int) -> str:
+        """Return the integer as a string on digits_format, eg. 1234 > 01234."""
+        digits = str(value).zfill(self.digits)
+        if len(self._groups) == 1 and not self._groups[0][0] and not self._tail:
+            return digits
+        return "".join(separator + digits[start:end]
+                       for separator, start, end in self._groups) + self._tail
+
+
 class _BaseRegexField(CharField):
     regex = None
     min_length = 1
@@ -77,36 +141,41 @@ class USZipCodeField(_BaseRegexField):
     regex = r'^\d{5}(?:-\d{4})?$'
 
 
-class ATZipCodeField(_BaseRegexField):
+class ATZipCodeField(_CompactDigits, _BaseRegexField):
     """Austria ZIP Codes Field (4 digits)."""
+    digits_format = "####"
     min_length = 4
     max_length = 4
     regex = r'^[1-9]{1}\d{3}$'
 
 
-class AUZipCodeField(_BaseRegexField):
+class AUZipCodeField(_CompactDigits, _BaseRegexField):
     """Australia ZIP Codes Field (4 digits)."""
+    digits_format = "####"
     min_length = 4
     max_length = 4
     regex = r'^\d{4}$'
 
 
-class BEZipCodeField(_BaseRegexField):
+class BEZipCodeField(_CompactDigits, _BaseRegexField):
     """Belgium ZIP Codes Field (4 digits)."""
+    digits_format = "####"
     min_length = 4
     max_length = 4
     regex = r'^[1-9]\d{3}$'
 
 
-class BRZipCodeField(_BaseRegexField):
+class BRZipCodeField(_CompactDigits, _BaseRegexField):
     """Brazil ZIP Code Field (XXXXX-XXX format)."""
+    digits_format = "#####-###"
     min_length = 8
     max_length = 10
     regex = r'^\d{5}-\d{3}$'
 
 
-class CHZipCodeField(_BaseRegexField):
+class CHZipCodeField(_CompactDigits, _BaseRegexField):
     """Swiss ZIP Code Field (4 digits)."""
+    digits_format = "####"
     min_length = 4
     max_length = 4
     regex = r'^[1-9]\d{3}$'
@@ -121,8 +190,9 @@ class CLRutField(_BaseRegexField):
     regex = r'^(\d{1,2}\.)?\d{3}\.\d{3}-[\dkK]$'
 
 
-class CNZipCodeField(_BaseRegexField):
+class CNZipCodeField(_CompactDigits, _BaseRegexField):
     """China ZIP Code (Mainland, 6 Digit) Field."""
+    digits_format = "######"
     min_length = 6
     max_length = 6
     regex = r'^\d{6}$'
@@ -141,55 +211,62 @@ class CONITField(_BaseRegexField):
     regex = r'^\d{5,12}-?\d$'
 
 
-class CUZipCodeField(_BaseRegexField):
+class CUZipCodeField(_CompactDigits, _BaseRegexField):
     """Cuba ZIP Codes (5 Digits) Field.
 
     http://mapanet.eu/Postal_Codes/?C=CU."""
+    digits_format = "#####"
     min_length = 5
     max_length = 6
     regex = r'^[1-9]\d{4}$'
 
 
-class CZZipCodeField(_BaseRegexField):
+class CZZipCodeField(_CompactDigits, _BaseRegexField):
     """Czech ZIP Code Field (XXXXX or XXX XX)."""
+    digits_format = "### ##"
     min_length = 5
     max_length = 6
     regex = r'^\d{5}$|^\d{3} \d{2}$'
 
 
-class DEZipCodeField(_BaseRegexField):
+class DEZipCodeField(_CompactDigits, _BaseRegexField):
     """German ZIP Code Field (5 Digits)."""
+    digits_format = "#####"
     min_length = 5
     max_length = 5
     regex = r'^([0]{1}[1-9]{1}|[1-9]{1}[0-9]{1})[0-9]{3}$'
 
 
-class EEZipCodeField(_BaseRegexField):
+class EEZipCodeField(_CompactDigits, _BaseRegexField):
     """Estonia ZIP Code Field (5 Digits)."""
+    digits_format = "#####"
     min_length = 5
     max_length = 5
     regex = r'^[1-9]\d{4}$'
 
 
-class ESZipCodeField(_BaseRegexField):
+class ESZipCodeField(_CompactDigits, _BaseRegexField):
     """Spain ZIP Code Field (5 Digits).
 
     Spanish postal code is a five digits string,
     with two first digits between 01 and 52, assigned to provinces code."""
+    digits_format = "#####"
     min_length = 5
     max_length = 5
     regex = r'^(0[1-9]|[1-4][0-9]|5[0-2])\d{3}$'
 
 
-class GRZipCodeField(_BaseRegexField):
+class GRZipCodeField(_CompactDigits, _BaseRegexField):
     """Greek ZIP Code Field (5 Digits)."""
+    digits_format = "#####"
     min_length = 5
     max_length = 5
     regex = r'^[12345678]\d{4}$'
 
 
-class HROIBField(_BaseRegexField):
+class HROIBField(_CompactDigits, _BaseRegexField):
     """Croatia Personal Identification Number Field, AKA OIB (11 Digits)."""
+    digits_format = "###########"
     min_length = 10
     max_length = 11
     regex = r'^\d{11}$'
@@ -202,22 +279,25 @@ class ILZipCodeField(_BaseRegexField):
     regex = r'^\d{5}$|^\d{7}$'
 
 
-class INZipCodeField(_BaseRegexField):
+class INZipCodeField(_CompactDigits, _BaseRegexField):
     """India ZIP Code Field (XXXXXX or XXX XXX)."""
+    digits_format = "######"
     min_length = 6
     max_length = 7
     regex = r'^\d{3}\s?\d{3}$'
 
 
-class ISIdNumberField(_BaseRegexField):
+class ISIdNumberField(_CompactDigits, _BaseRegexField):
     """Iceland identification number Field, AKA Kennitala (XXXXXX-XXXX)."""
+    digits_format = "######-####"
     min_length = 10
     max_length = 11
     regex = r'^\d{6}(-| )?\d{4}$'
 
 
-class JPZipCodeField(_BaseRegexField):
+class JPZipCodeField(_CompactDigits, _BaseRegexField):
     """Japan ZIP Code Field."""
+    digits_format = "###-####"
     max_length = 8
     regex = r'^\d{3}-\d{4}$|^\d{7}$'
 
@@ -236,10 +316,11 @@ class MTZipCodeField(_BaseRegexField):
     regex = r'^[A-Z]{3}\ \d{4}$'
 
 
-class MXZipCodeField(_BaseRegexField):
+class MXZipCodeField(_CompactDigits, _BaseRegexField):
     """Mexico ZIP Code Field (XXXXX format).
 
     http://en.wikipedia.org/wiki/List_of_postal_codes_in_Mexico."""
+    digits_format = "#####"
     min_length = 5
     max_length = 6
     regex = r'^(0[1-9]|[1][0-6]|[2-9]\d)(\d{3})$'
@@ -254,34 +335,38 @@ class PLNationalIDCardNumberField(_BaseRegexField):
     regex = r'^[A-Za-z]{3}\d{6}$'
 
 
-class PLNIPField(_BaseRegexField):
+class PLNIPField(_CompactDigits, _BaseRegexField):
     """Polish Tax Number Field (NIP).
 
     The format is XXX-YYY-YY-YY, XXX-YY-YY-YYY or XXXYYYYYYY.
     http://wipos.p.lodz.pl/zylla/ut/nip-rego.html."""
+    digits_format = "##########"
     min_length = 10
     max_length = 15
     regex =  r'^\d{3}-\d{3}-\d{2}-\d{2}$|^\d{3}-\d{2}-\d{2}-\d{3}$|^\d{10}$'
 
 
-class PLZipCodeField(_BaseRegexField):
+class PLZipCodeField(_CompactDigits, _BaseRegexField):
     """Polish ZIP Code Field (XX-XXX format)."""
+    digits_format = "##-###"
     min_length = 5
     max_length = 6
     regex =  r'^\d{2}-\d{3}$'
 
 
-class PTZipCodeField(_BaseRegexField):
+class PTZipCodeField(_CompactDigits, _BaseRegexField):
     """Portuguese ZIP Code Field.
 
     XYYY-YYY (where X is a digit between 1 and 9, Y is any other digit)."""
+    digits_format = "####-###"
     min_length = 7
     max_length = 8
     regex =  r'^[1-9]\d{3}-\d{3}$'
 
 
-class ROZipCodeField(_BaseRegexField):
+class ROZipCodeField(_CompactDigits, _BaseRegexField):
     """Romania ZIP Code Field (XXXXXX format)."""
+    digits_format = "######"
     min_length = 6
     max_length = 6
     regex =  r'^[0-9][0-8][0-9]{4}$'
@@ -296,8 +381,9 @@ class ROCIFField(_BaseRegexField):
     regex =  r'^(RO)?[0-9]{2,10}'
 
 
-class ROCNPField(_BaseRegexField):
+class ROCNPField(_CompactDigits, _BaseRegexField):
     """Romania Personal Identity Code Field (CNP)."""
+    digits_format = "#############"
     min_length = 12
     max_length = 13
     regex =  r'^[1-9][0-9]{12}'
@@ -311,24 +397,27 @@ class RUPassportNumberField(_BaseRegexField):
     regex =  r'^\d{4} \d{6}$|^\d{2} \d{7}$'
 
 
-class SEZipCodeField(_BaseRegexField):
+class SEZipCodeField(_CompactDigits, _BaseRegexField):
     """Swedish ZIP Code Field (5 digits).
 
     Can optionally be formatted with a space after the third digit (XXX XX)."""
+    digits_format = "### ##"
     min_length = 5
     max_length = 6
     regex =  r'^[1-9]\d{2} ?\d{2}$'
 
 
-class SKZipCodeField(_BaseRegexField):
+class SKZipCodeField(_CompactDigits, _BaseRegexField):
     """Slovak ZIP Code Field (XXXXX or XXX XX, where X is integer)."""
+    digits_format = "### ##"
     min_length = 5
     max_length = 6
     regex = r'^\d{5}$|^\d{3} \d{2}$'
 
 
-class UAZipCodeField(_BaseRegexField):
+class UAZipCodeField(_CompactDigits, _BaseRegexField):
     """Ukrainian ZIP Code Field (5 digits,first 2 numbers must not be '00')."""
+    digits_format = "#####"
     min_length = 5
     max_length = 5
     regex = r'^(?!00)\d{5}$'
@@ -339,3 +428,88 @@ class UYCIField(_BaseRegexField):
     min_length = 8
     max_length = 12
     regex = r'(?P<num>(\d{6,7}|(\d\.)?\d{3}\.\d{3}))-?(?P<val>\d)'
+
+
+def _non_capturing(pattern: str) -> str:
+    """Return the Regex with all its groups as non-capturing groups."""
+    pattern = re.sub(r"\(\?P<\w+>", "(?:", pattern)  # Named groups.
+    result, escaped, in_class = [], False, False
+    for index, character in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif character == "\\":
+            escaped = True
+        elif character == "[":
+            in_class = True
+        elif character == "]":
+            in_class = False
+        elif (character == "(" and not in_class and
+              not pattern.startswith("?", index + 1)):
+            character = "(?:"
+        result.append(character)
+    return "".join(result)
+
+
+class RegexFieldClassifier(object):
+    """Finds which _BaseRegexField formats match values of unknown columns.
+
+    All the Regex are merged into 1 combined Regex, 1 lookahead group per
+    field class, so 1 match() per value returns every matching class.
+    Values are stripped and checked for min_length like db_value() does.
+    field_classes defaults to all the _BaseRegexField subclasses."""
+
+    def __init__(self, field_classes=None, cache_size: int=65_536):
+        if field_classes is None:
+            field_classes, pending = [], list(_BaseRegexField.__subclasses__())
+            while pending:
+                field_class = pending.pop(0)
+                pending.extend(field_class.__subclasses__())
+                if field_class.regex and field_class not in field_classes:
+                    field_classes.append(field_class)
+        self.field_classes = tuple(field_classes)
+        self.pattern = re.compile("(?![\\s\\S]{256})" + "".join(
+            f"(?:(?=[\\s\\S]{{{max(field_class.min_length, 1)}}})"
+            f"(?=({_non_capturing(field_class.regex)}))|)"
+            for field_class in self.field_classes))
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, value: str) -> frozenset:
+        match = self.pattern.match(value.strip())
+        if match is None:  # Longer than 255 Characters.
+            return frozenset()
+        return frozenset(compress(self.field_classes,
+                                  map(is_not, match.groups(), repeat(None))))
+
+    def classify_many(self, values) -> list:
+        """Return a frozenset of matching field classes per value."""
+        classify = self.classify  # OPTIMIZATION
+        return [classify(value) if isinstance(value, str) else frozenset()
+                for value in values]
+
+    def report(self, values, examples: int=5) -> dict:
+        """Return a field type suggestion report of a column of values.
+
+        matches counts the values each class accepts, suggestions are the
+        classes sorted by it, with the share of the non-empty values."""
+        signatures, empty, unmatched = Counter(), 0, []
+        for value in values:
+            if value is None or (isinstance(value, str) and not value.strip()):
+                empty += 1
+                continue
+            classes = self.classify(value) if isinstance(value, str) else frozenset()
+            signatures[classes] += 1
+            if not classes and len(unmatched) < examples:
+                unmatched.append(value)
+        matches, rows = Counter(), sum(signatures.values())
+        for classes, count in signatures.items():
+            for field_class in classes:
+                matches[field_class.__name__] += count
+        return {
+            "rows": rows + empty,
+            "empty": empty,
+            "unmatched": signatures[frozenset()],
+            "unmatched_examples": unmatched,
+            "matches": dict(matches.most_common()),
+            "suggestions": [(name, round(count / rows, 4))
+                            for name, count in matches.most_common()],
+        }
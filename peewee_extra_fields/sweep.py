@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+
+"""Extra Fields for Peewee ORM. Garbage collector for FileField files.
+
+Deleting or updating a row never removes the file FileField wrote,
+sweep_orphans() finds the files that no row references and removes them.
+Both the referenced paths and the directory walk are sorted out of core
+in runs of run_size paths, so memory does not grow with millions of files."""
+
+
+import heapq
+import itertools
+import os
+import tempfile
+import time
+
+from contextlib import ExitStack
+
+from peewee import CompositeKey
+
+try:
+    from playhouse.postgres_ext import PostgresqlExtDatabase, ServerSide
+except ImportError:
+    PostgresqlExtDatabase = ServerSide = None
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _sorted_runs(paths, run_size: int, stack):
+    """Sort paths out of core, return an iterator of unique sorted paths."""
+    runs = []
+    while True:
+        run = sorted(itertools.islice(paths, run_size))
+        if not run:
+            break
+        run_file = stack.enter_context(tempfile.TemporaryFile(
+            "w+", encoding="utf-8", errors="surrogateescape", newline="\n"))
+        run_file.writelines(f"{path}\n" for path in run)
+        run_file.seek(0)
+        runs.append(line[:-1] for line in run_file)
+    previous = None
+    for path in heapq.merge(*runs):
+        if path != previous:
+            yield path
+            previous = path
+
+
+def _referenced_paths(field, batch_size: int):
+    """Yield the paths stored on a FileField column, streamed.
+
+    PostgresqlExtDatabase uses a server-side (named) cursor, in a
+    transaction as it requires, other databases page by primary key,
+    batch_size rows per query, client-side cursors buffer every row."""
+    model = field.model
+    query = model.select(field).where(field.is_null(False)).tuples()
+    database = model._meta.database
+    database = getattr(database, "obj", database)  # Unwrap DatabaseProxy.
+    primary_key = model._meta.primary_key
+    if PostgresqlExtDatabase and isinstance(database, PostgresqlExtDatabase):
+        with database.atomic():
+            for reference, in ServerSide(query, array_size=batch_size):
+                yield _key(reference.file_path)
+    elif not primary_key or isinstance(primary_key, CompositeKey):
+        for reference, in query.iterator():
+            yield _key(reference.file_path)
+    else:
+        query = (model.select(primary_key, field).where(field.is_null(False))
+                 .order_by(primary_key).limit(batch_size).tuples())
+        page = list(query)
+        while page:
+            for _, reference in page:  # python_value() does not read files.
+                yield _key(reference.file_path)
+            if len(page) < batch_size:
+                break
+            page = list(query.where(primary_key > page[-1][0]))
+
+
+def _stored_paths(folder: str, min_age: float, skip: str):
+    """Yield the files on folder older than min_age, no temp uploads."""
+    newest = time.time() - min_age
+    for root, folders, files in os.walk(folder):
+        folders[:] = [name for name in folders
+                      if _key(os.path.join(root, name)) != skip]
+        for name in files:
+            path = os.path.join(root, name)
+            if name.startswith(".upload-"):  # In-flight writes.
+                continue
+            try:
+                if os.stat(path).st_mtime > newest:  # Row may not be committed.
+                    continue
+            except FileNotFoundError:
+                continue
+            yield _key(path)
+
+
+def _orphans(stored, referenced):
+    """Sorted merge, yield the stored paths missing from referenced."""
+    reference = next(referenced, None)
+    for path in stored:
+        while reference is not None and reference < path:
+            reference = next(referenced, None)
+        if path != reference:
+            yield path
+
+
+def sweep_orphans(fields, dry_run: bool=True, quarantine: str=None,
+                  min_age: float=3_600, batch_size: int=1_000,
+                  run_size: int=100_000) -> dict:
+    """Delete (or move to quarantine) the files no FileField row references.
+
+    fields are FileFields of Models, eg. [Attachment.data, Avatar.image],
+    every field storing on the same folder must be given, else its files
+    are orphans. dry_run only counts. Files newer than min_age seconds are
+    kept, their row may not be committed yet. Returns a throughput report."""
+    started = time.perf_counter()
+    skip = _key(quarantine) if quarantine else None
+    report = {"folders": 0, "files": 0, "referenced": 0, "orphans": 0,
+              "bytes": 0, "removed": 0, "dry_run": dry_run}
+    by_folder = {}
+    for field in fields:
+        by_folder.setdefault(_key(field.folder_for_files), []).append(field)
+
+    for folder, folder_fields in by_folder.items():
+        report["folders"] += 1
+        with ExitStack() as stack:
+            referenced = itertools.chain.from_iterable(
+                _referenced_paths(field, batch_size) for field in folder_fields)
+            referenced = _sorted_runs(referenced, run_size, stack)
+            counted = _count(referenced, report, "referenced")
+            stored = _count(_sorted_runs(_stored_paths(folder, min_age, skip),
+                                         run_size, stack), report, "files")
+            orphans = _orphans(stored, counted)
+            while True:
+                batch = list(itertools.islice(orphans, batch_size))
+                if not batch:
+                    break
+                report["orphans"] += len(batch)
+                for path in batch:
+                    try:
+                        report["bytes"] += os.path.getsize(path)
+                        if dry_run:
+                            continue
+                        if quarantine:
+                            target = os.path.join(
+                                quarantine, os.path.relpath(path, folder))
+                            os.makedirs(os.path.dirname(target), exist_ok=True)
+                            os.replace(path, target)
+                        else:
+                            os.unlink(path)
+                        report["removed"] += 1
+                    except FileNotFoundError:
+                        continue  # Removed meanwhile.
+            for _ in counted:  # Count the rest of referenced.
+                pass
+
+    report["seconds"] = time.perf_counter() - started
+    report["files_per_second"] = (report["files"] / report["seconds"]
+                                  if report["seconds"] else 0)
+    return report
+
+
+def _count(iterable, report: dict, key: str):
+    for item in iterable:
+        report[key] += 1
+        yield item
@@ -11,10 +11,13 @@ from collections import namedtuple
 
 from peewee import FixedCharField
 
+from .regex_fields import _CompactDigits
 
-class USSocialSecurityNumberField(FixedCharField):
+
+class USSocialSecurityNumberField(_CompactDigits, FixedCharField):
     """FixedCharField clone but only accepts USA Social Security Numbers."""
     max_length = 11
+    digits_format = "###-##-####"
 
     def db_value(self, value: str) -> str:
         if isinstance(value, str):
@@ -72,11 +75,12 @@ class USSocialSecurityNumberField(FixedCharField):
                 valid U.S.A. Social Security Number string (XXX-XX-XXXX format)
                 (promo & permanently invalid numbers): {value} -> {area}.""")
 
-            return str(f"{area}-{group}-{serial}")
+            return super().db_value(f"{area}-{group}-{serial}")
 
-        return value
+        return super().db_value(value)
 
     def python_value(self, value: str) -> namedtuple:
+        value = super().python_value(value)  # Formats compact integers.
         if value and isinstance(value, str):
             return namedtuple(
                 "USSocialSecurityNumber", "ssn area group serial")(
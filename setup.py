@@ -49,7 +49,11 @@ from setuptools import setup
 MODULES2CYTHONIZE = ("peewee_extra_fields/ar_fields.py",
                      "peewee_extra_fields/us_fields.py",
                      "peewee_extra_fields/legacy_fields.py",
-                     "peewee_extra_fields/regex_fields.py")
+                     "peewee_extra_fields/regex_fields.py",
+                     "peewee_extra_fields/compression.py",
+                     "peewee_extra_fields/files.py",
+                     "peewee_extra_fields/sweep.py",
+                     "peewee_extra_fields/matching.py")
 
 
 ##############################################################################
@@ -5,19 +5,27 @@
 """Peewee Extra Fields Unittests."""
 
 
+import asyncio
+import io
 import os
+import re
 import shutil
+import socket
+import tempfile
+import time
 import unittest
 from decimal import Decimal
+from enum import Enum, Flag
 from ipaddress import (IPv4Address, IPv4Network, IPv6Address, IPv6Network,
                        ip_address, ip_network)
 from random import randint, choice
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone
 
 from peewee import *
 
 from peewee_extra_fields import *
-from peewee_extra_fields import exceptions
+from peewee_extra_fields import ZIP_CODE_PATTERNS, exceptions
+from peewee_extra_fields.matching import Automaton
 
 
 # Random order for tests runs. (Original is: -1 if x<y, 0 if x==y, 1 if x>y).
@@ -236,6 +244,75 @@ class TestFields(unittest.TestCase):
         for raw_value, slug_value in zip(invalid_values, valid_values):
             self.assertEqual(CharFieldCustom(force_slugify=True).db_value(raw_value), slug_value)
 
+    def test_CharFieldCustom_normalization_plan(self):
+        values = ("Ñandú Café", "ascii only", "Straße 😼 №5", "", None)
+
+        field = CharFieldCustom(use_lower=True, transliterate=True,
+                                force_ascii="?", force_slugify=True)
+        self.assertEqual([field.db_value(value) for value in values],
+                         ["nandu-cafe", "ascii-only", "stra-e-No5", "", None])
+        self.assertEqual(field.db_values(values),
+                         [field.db_value(value) for value in values])
+
+        field = CharFieldCustom(transliterate={"ß": "ss", "ñ": "ny"})
+        self.assertEqual(field.db_value("Straße ñ😼"), "Strasse ny😼")
+        field.force_ascii = ""
+        field.compile_plan()
+        self.assertEqual(field.db_value("Straße ñ😼"), "Strasse ny")
+
+        field = CharFieldCustom(min_lenght=3, blacklist=("spam", ), use_lower=True)
+        self.assertEqual(field.db_values(["EGGS", None]), ["eggs", None])
+        with self.assertRaises(ValueError):
+            field.db_values(["eggs", "SPAM"])
+        with self.assertRaises(ValueError):
+            CharFieldCustom(transliterate={"ab": "c"})
+
+    def test_CharFieldCustom_list_match(self):
+        bad_words = ("Nazi", "shit", "foo bar")
+
+        field = CharFieldCustom(blacklist=bad_words)  # Exact, case insensitive.
+        self.assertEqual(field.db_value("NAZI is bad"), "NAZI is bad")
+        with self.assertRaises(ValueError):
+            field.db_value("nAzI")
+
+        field = CharFieldCustom(blacklist=bad_words, list_match="word")
+        self.assertEqual(field.db_value("bullshitting foo"), "bullshitting foo")
+        for value in ("you shit!", "Foo, bar", "a FOO BAR b"):
+            with self.assertRaises(ValueError):
+                field.db_value(value)
+
+        field = CharFieldCustom(blacklist=bad_words, list_match="substring")
+        self.assertEqual(field.db_value("foo-baz"), "foo-baz")
+        for value in ("bullshitting", "xxfoo barxx", "NaZi"):
+            with self.assertRaises(ValueError):
+                field.db_value(value)
+
+        with self.assertRaises(ValueError):
+            CharFieldCustom(blacklist=bad_words, list_match="fuzzy")
+
+        words = ["he", "she", "his", "hers"]  # Overlapping, failure links.
+        automaton = Automaton(words)
+        found = sorted("ushers"[start:end] for start, end in automaton.iter("ushers"))
+        self.assertEqual(found, ["he", "hers", "she"])
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = MappedWordList.write(os.path.join(folder, "words.txt"),
+                                        [f"Word{i}" for i in range(1000)] + ["ñandú"])
+            words = MappedWordList(path)
+            self.assertIn("word0", words)
+            self.assertIn("WORD999", words)
+            self.assertIn("Ñandú", words)
+            self.assertNotIn("word1000", words)
+            self.assertNotIn("a", words)
+            self.assertEqual(len(list(words)), 1001)
+            for list_match in ("exact", "word", "substring"):
+                field = CharFieldCustom(whitelist=words, list_match=list_match)
+                self.assertEqual(field.db_value("word42"), "word42")
+                with self.assertRaises(ValueError):
+                    field.db_value("nothing")
+            with self.assertRaises(ValueError):
+                CharFieldCustom(blacklist=words, list_match="word").db_value("a word7 b")
+
     def test_PastDateField(self):
         for i in range(9):
             value = date(year=randint(1800, date.today().year),
@@ -278,6 +355,96 @@ class TestFields(unittest.TestCase):
                 print(value)
                 PastDateTimeField().db_value(value)
 
+    def test_PastDateField_fast(self):
+        field, future = PastDateField(formats=["%d/%m/%Y"]), date.today().year + 1
+        self.assertEqual(field.db_value("2001-02-03"), "2001-02-03")  # fromisoformat.
+        self.assertEqual(field.db_value("03/02/2001"), "03/02/2001")
+        self.assertEqual(field._last_format, "%d/%m/%Y")
+        self.assertEqual(field.db_value(0), date(1970, 1, 1))
+        for value in (f"{future}-01-01", f"01/01/{future}", "not a date"):
+            with self.assertRaises(ValueError):
+                field.db_value(value)
+        self.assertEqual(field.db_values([0, 86_400]), [date(1970, 1, 1), date(1970, 1, 2)])
+        with self.assertRaises(ValueError):
+            field.db_values([0, int(datetime(future, 1, 1).timestamp())])
+
+        field = PastDateTimeField(now_granularity=60)
+        self.assertIs(field.now(), field.now())  # Cached for 60 seconds.
+        self.assertEqual(field.db_value("2001-02-03T04:05:06+00:00"), "2001-02-03T04:05:06+00:00")
+        self.assertEqual(field.db_values(["2001-02-03 04:05:06", 60]),
+                         ["2001-02-03 04:05:06", datetime(1970, 1, 1, 0, 1)])
+        with self.assertRaises(ValueError):
+            field.db_value(f"{future}-01-01 00:00:00")
+
+        field = PastDateTimeField(now_granularity=60)  # A stale cached "now".
+        self.assertTrue(field.db_value(datetime.utcnow()))
+        time.sleep(0.2)
+        self.assertTrue(field.db_value(datetime.utcnow()))
+        self.assertTrue(field.db_value(datetime.now(timezone.utc).isoformat()))
+        self.assertTrue(field.db_values([int(datetime.now(timezone.utc).timestamp())]))
+
+    def test_DateTimeTZRangeField(self):
+        class Booking(Model):
+            period = DateTimeTZRangeField()
+            class Meta:
+                database = db
+
+        db.create_tables([Booking])
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        first = Booking.create(period=(start, start + timedelta(hours=2)))
+        second = Booking.create(period=DateTimeTZRange(start + timedelta(hours=2), start + timedelta(hours=3)))
+        period = Booking.get_by_id(first.id).period
+        self.assertEqual(period, DateTimeTZRange(start, start + timedelta(hours=2)))
+        self.assertIn(start + timedelta(hours=1), period)
+        self.assertNotIn(start + timedelta(hours=2), period)  # [) excludes upper.
+
+        def ids(expression):
+            return sorted(booking.id for booking in Booking.select().where(expression))
+
+        self.assertEqual(ids(Booking.period.overlaps((start + timedelta(hours=1), start + timedelta(minutes=150)))),
+                         [first.id, second.id])
+        self.assertEqual(ids(Booking.period.overlaps((start + timedelta(hours=3), None))), [])
+        self.assertEqual(ids(Booking.period.contains(start + timedelta(hours=2))), [second.id])
+        self.assertEqual(ids(Booking.period.contains((start, start + timedelta(hours=1)))), [first.id])
+        self.assertEqual(ids(Booking.period.adjacent((start + timedelta(hours=3), None))), [second.id])
+
+        hours = [start + timedelta(hours=hour) for hour in range(9)]
+        Booking.update(period=(hours[4], hours[5])).where(Booking.id == first.id).execute()
+        self.assertEqual(Booking.get_by_id(first.id).period, DateTimeTZRange(hours[4], hours[5]))
+        Booking.update(period=hours[3]).where(Booking.id == first.id).execute()  # Lower only.
+        self.assertEqual(Booking.get_by_id(first.id).period, DateTimeTZRange(hours[3], hours[5]))
+        Booking.insert(period=(hours[6], hours[7])).execute()
+        Booking.insert_many([{"period": (hours[7], hours[8])}, {Booking.period: (hours[0], hours[1])}]).execute()
+        Booking.insert_many([((hours[0], hours[8]),)], fields=[Booking.period]).execute()
+        self.assertEqual([booking.period for booking in Booking.select().where(Booking.id > second.id).order_by(Booking.id)],
+                         [DateTimeTZRange(hours[6], hours[7]), DateTimeTZRange(hours[7], hours[8]),
+                          DateTimeTZRange(hours[0], hours[1]), DateTimeTZRange(hours[0], hours[8])])
+        booking = Booking.select(Booking.period_upper, Booking.period).where(Booking.id == first.id).get()
+        self.assertEqual(booking.period, DateTimeTZRange(hours[3], hours[5]))  # Any column order.
+        Booking.delete().where(Booking.id > second.id).execute()
+        Booking.update(period=DateTimeTZRange(start, start + timedelta(hours=2))).where(Booking.id == first.id).execute()
+
+        self.assertEqual(DateTimeTZRange.parse(str(period)), period)
+        self.assertTrue(period.overlaps((start + timedelta(hours=1), None)))
+        with self.assertRaises(ValueError):
+            DateTimeTZRange(start + timedelta(hours=1), start)
+        Booking.delete().execute()
+
+        proxy = DatabaseProxy()  # Unknown database on bind, no silent guess.
+        with self.assertRaises(ValueError):
+            class Unknown(Model):
+                period = DateTimeTZRangeField()
+                class Meta:
+                    database = proxy
+
+        class Explicit(Model):
+            period = DateTimeTZRangeField(two_columns=False)
+            class Meta:
+                database = proxy
+
+        self.assertNotIn("period_upper", Explicit._meta.fields)
+        self.assertEqual(Explicit.period.index_type, "GIST")
+
     def test_LanguageISOCodeField(self):
         valid_values = ("en", "es", "ru", "zu", "pi", "is", "de", "tt", "br")
         invalid_values = ("xx", "bb", "zz", "uu", "px", "42", "cx", "uc", "yyy")
@@ -418,6 +585,146 @@ class TestFields(unittest.TestCase):
             with self.assertRaises(ValueError):
                 USSocialSecurityNumberField().db_value(value)
 
+    def test_RegexFieldClassifier(self):
+        classifier = RegexFieldClassifier()
+        self.assertIn(DEZipCodeField, classifier.field_classes)
+        self.assertIn(SemVerField, classifier.field_classes)
+        values = ["01067", " 80331 ", "100-0001", "123 45", "1.2.3", "v1.0.0-rc",
+                  "12345-6789", "RO1234", "ABC 1234", "1234567890123", "a" * 300,
+                  "12.345.678-5", "1234567-8", "abc", "", "00-950", "01001-000"]
+        values += ["".join(choice("0123456789- .") for _ in range(randint(1, 14)))
+                   for _ in range(300)]
+
+        for value, classes in zip(values, classifier.classify_many(values)):
+            accepted = set()
+            for field_class in classifier.field_classes:  # The slow way.
+                try:
+                    field_class().db_value(value)
+                except ValueError:
+                    pass
+                else:
+                    accepted.add(field_class)
+            if value.strip():
+                self.assertEqual(classes, accepted, value)
+        self.assertEqual(classifier.classify("01067") & {DEZipCodeField, JPZipCodeField},
+                         {DEZipCodeField})
+
+        report = RegexFieldClassifier([DEZipCodeField, JPZipCodeField]).report(
+            ["01067", "80331", "100-0001", None, " ", "nope", 42])
+        self.assertEqual(report["rows"], 7)
+        self.assertEqual(report["empty"], 2)
+        self.assertEqual(report["unmatched"], 2)
+        self.assertEqual(report["unmatched_examples"], ["nope", 42])
+        self.assertEqual(report["matches"], {"DEZipCodeField": 2, "JPZipCodeField": 1})
+        self.assertEqual(report["suggestions"][0], ("DEZipCodeField", 0.4))
+
+    def test_InternationalZipCodeField(self):
+        valid_values = (("de", "01067"), ("JP", "100-0001"), ("br", "01001-000"),
+                        ("US", "12345-6789"), ("NZ", "6011"))  # NZ has no Regex.
+        invalid_values = (("DE", "1067"), ("JP", "1000001x"), ("xx", "12345"),
+                          ("US", "1234"), (None, "12345"))
+
+        field = InternationalZipCodeField()
+        for value in valid_values:
+            self.assertEqual(field.db_value(value), value[1])
+        for value in invalid_values:
+            with self.assertRaises(ValueError):
+                field.db_value(value)
+        with self.assertRaises(ValueError):
+            InternationalZipCodeField(strict=True).db_value(("NZ", "6011"))
+
+        self.assertEqual(field.validate_many(valid_values + invalid_values),
+                         [True] * 5 + [False] * 5)
+        self.assertEqual(InternationalZipCodeField(strict=True).validate_many(
+            [("nz", "6011"), ("de", "01067"), ("de", 1067)]), [False, True, False])
+        self.assertEqual(set(ZIP_CODE_PATTERNS) >= {"ar", "de", "jp", "us"}, True)
+
+        class Address(Model):
+            zip_code = InternationalZipCodeField()
+            class Meta:
+                database = db
+
+        db.create_tables([Address])
+        for value in valid_values:
+            Address.create(zip_code=value)
+        self.assertEqual([address.zip_code for address in Address.select().order_by(Address.id)],
+                         [InternationalZipCode(country.upper(), postal_code)
+                          for country, postal_code in valid_values])
+        self.assertEqual(Address.select().where(Address.zip_code.equals(("de", "01067"))).count(), 1)
+        self.assertEqual(Address.select().where(Address.zip_code.equals(("at", "01067"))).count(), 0)
+        self.assertEqual(Address.select(Address.zip_code_country).where(
+            Address.zip_code == "6011").scalar(), "NZ")
+        with self.assertRaises(ValueError):
+            Address.create(zip_code=("DE", "1067"))
+
+        first = Address.select().order_by(Address.id).first()
+        Address.update(zip_code=("AT", "1010")).where(Address.id == first.id).execute()
+        self.assertEqual(Address.get_by_id(first.id).zip_code, InternationalZipCode("AT", "1010"))
+        Address.update(zip_code="1020").where(Address.id == first.id).execute()  # Postal code only.
+        self.assertEqual(Address.get_by_id(first.id).zip_code, InternationalZipCode("AT", "1020"))
+        Address.insert(zip_code=("fr", "75001")).execute()
+        Address.insert_many([{"zip_code": ("it", "00118")}, {Address.zip_code: ("es", "28001")}]).execute()
+        Address.insert_many([(("ch", "8001"),)], fields=["zip_code"]).execute()
+        self.assertEqual([address.zip_code for address in Address.select().order_by(Address.id)][-4:],
+                         [InternationalZipCode("FR", "75001"), InternationalZipCode("IT", "00118"),
+                          InternationalZipCode("ES", "28001"), InternationalZipCode("CH", "8001")])
+        with self.assertRaises(ValueError):
+            Address.insert_many([{"zip_code": ("DE", "1067")}]).execute()
+        address = Address.select(Address.zip_code_country, Address.zip_code).where(Address.id == first.id).get()
+        self.assertEqual(address.zip_code, InternationalZipCode("AT", "1020"))  # Any column order.
+        db.drop_tables([Address])
+
+    def test_compact_digits(self):
+        cases = (  # Field class, value, stored integer, value read.
+            (DEZipCodeField, "01067", 1067, "01067"),
+            (CZZipCodeField, "12345", 12345, "123 45"),
+            (BRZipCodeField, "01001-000", 1001000, "01001-000"),
+            (ARCUITField, "20-12345678-3", 20123456783, "20123456783"),
+            (HROIBField, "00123456789", 123456789, "00123456789"),
+            (ROCNPField, "1234567890123", 1234567890123, "1234567890123"),
+            (CNZipCodeField, "010000", 10000, "010000"),
+        )
+        for field_class, value, stored, read in cases:
+            field = field_class(compact=True)
+            self.assertEqual(field.db_value(value), stored)
+            self.assertEqual(field.db_value(stored), stored)
+            self.assertEqual(field.python_value(stored), read)
+            self.assertIsNone(field.db_value(None))
+            self.assertEqual(field_class().db_value(value), field_class().db_value(value))
+
+        ssn = USSocialSecurityNumberField(compact=True)
+        self.assertEqual(ssn.db_value("205-21-9000"), 205219000)
+        self.assertEqual(ssn.python_value(205219000).ssn, "205-21-9000")
+        self.assertEqual(ssn.python_value(205219000).serial, 9000)
+
+        for field, value in ((DEZipCodeField(compact=True), "00067"),  # Regex.
+                             (DEZipCodeField(compact=True), 67),       # Regex.
+                             (DEZipCodeField(compact=True), 123456),
+                             (DEZipCodeField(compact=True), -1),
+                             (ssn, 666219000), (ARCUITField(compact=True), "20-1")):
+            with self.assertRaises(ValueError):
+                field.db_value(value)
+        with self.assertRaises(TypeError):
+            SemVerField(compact=True)  # No fixed digits.
+
+        class Address(Model):
+            zip_code = DEZipCodeField(compact=True, index=True)
+            ssn = USSocialSecurityNumberField(compact=True, null=True)
+            class Meta:
+                database = db
+
+        db.create_tables([Address])
+        self.assertEqual(Address.zip_code.field_type, "INT")
+        self.assertEqual(Address.ssn.field_type, "INT")
+        self.assertEqual(ROCNPField(compact=True).field_type, "BIGINT")
+        Address.insert_many([("01067", None), ("80331", "205-21-9000")],
+                            fields=[Address.zip_code, Address.ssn]).execute()
+        self.assertEqual([address.zip_code for address in Address.select().order_by(Address.zip_code)],
+                         ["01067", "80331"])
+        self.assertEqual(Address.get(Address.zip_code == "01067").ssn, None)
+        self.assertEqual(Address.get(Address.zip_code < "10000").zip_code, "01067")
+        db.drop_tables([Address])
+
     def test_ColorHexadecimalField(self):
         valid_values = ("#bebebe", "#f0f0f0", "#000000", "#ffffff")
         invalid_values = ("", "1", "abc", "#0000gg", "#00h", "#-1f0f0")
@@ -431,6 +738,41 @@ class TestFields(unittest.TestCase):
             with self.assertRaises(ValueError):
                 ColorHexadecimalField().db_value(value)
 
+    def test_HexadecimalField(self):
+        digest = bytes.fromhex("deadbeef00ff")
+
+        self.assertEqual(HexadecimalField().db_value("deadbeef00ff"), digest)
+        for value in (digest, bytearray(digest), memoryview(digest)):
+            self.assertIs(HexadecimalField().db_value(value), value)
+        for value in ("abc", "0xgg", "hello"):
+            with self.assertRaises(ValueError):
+                HexadecimalField().db_value(value)
+        with self.assertRaises(ValueError):
+            HexadecimalField(output="base64")
+
+        self.assertEqual(HexadecimalField().python_value(memoryview(digest)), "deadbeef00ff")
+        self.assertIs(HexadecimalField(output="bytes").python_value(digest), digest)
+        self.assertEqual(HexadecimalField(output="bytes").python_value(memoryview(digest)), digest)
+        lazy = HexadecimalField(output="lazy").python_value(memoryview(digest))
+        self.assertIsInstance(lazy, HexBytes)
+        self.assertEqual(lazy, digest)
+        self.assertNotEqual(lazy, "deadbeef00ff")  # bytes, hash and == agree.
+        self.assertEqual(str(lazy), "deadbeef00ff")
+        self.assertEqual(f"{lazy}", "deadbeef00ff")
+        self.assertEqual(len({lazy, digest}), 1)
+
+        class Token(Model):
+            code = HexadecimalField(output="lazy")
+            class Meta:
+                database = db
+
+        db.create_tables([Token])
+        Token.create(code=memoryview(digest))
+        Token.create(code="00")
+        self.assertEqual([str(token.code) for token in Token.select().order_by(Token.id)],
+                         ["deadbeef00ff", "00"])
+        db.drop_tables([Token])
+
     def test_SemVerField(self):
         valid_values = (
             '0.0.0', '0.10.0', 'v1.0.0', '0.0.0-foo', '1.2.3-4', '2.7.2+asdf',
@@ -465,6 +807,72 @@ class TestFields(unittest.TestCase):
         self.assertIsInstance(salary.dollars, str)
         invoice.delete_instance()
 
+    def test_EnumField(self):
+        Color = Enum("Color", {"RED": 1, "GREEN": 2})
+
+        class Paint(Model):
+            color = EnumField(Color)
+            class Meta:
+                database = db
+
+        db.create_tables([Paint])
+        paint = Paint.create(color=Color.GREEN)
+        Paint.create(color="RED")  # By name.
+        self.assertIs(Paint.get_by_id(paint.id).color, Color.GREEN)
+        self.assertEqual(Paint.color.db_values([Color.RED, 2, None]), [1, 2, None])
+        self.assertEqual(Paint.color.python_values([1, 2, None]), [Color.RED, Color.GREEN, None])
+        self.assertIs(Paint.color.coerce(1), Color.RED)
+        for value in (3, "BLUE"):
+            with self.assertRaises(ValueError):
+                Paint.color.db_value(value)
+        with self.assertRaises(TypeError):
+            EnumField(int)
+        Paint.delete().execute()
+
+    def test_FlagField(self):
+        Permission = Flag("Permission", {"READ": 1, "WRITE": 2, "ADMIN": 4})
+
+        class Account(Model):
+            permissions = FlagField(Permission, index=True)
+            class Meta:
+                database = db
+
+        db.create_tables([Account])
+        reader = Account.create(permissions=Permission.READ)
+        writer = Account.create(permissions=[Permission.READ, Permission.WRITE])
+        Account.create(permissions=0)
+        self.assertEqual(Account.get_by_id(writer.id).permissions, Permission.READ | Permission.WRITE)
+
+        def ids(expression):
+            return sorted(account.id for account in Account.select().where(expression))
+
+        self.assertEqual(ids(Account.permissions.has_any(Permission.WRITE | Permission.ADMIN)), [writer.id])
+        self.assertEqual(ids(Account.permissions.has_all([Permission.READ])), [reader.id, writer.id])
+        with self.assertRaises(ValueError):
+            Account.permissions.db_value(8)
+        Account.delete().execute()
+
+    def test_MoneyField_minor_units(self):
+        class Sale(Model):
+            amount = MoneyField(minor_units=2, currency_field="currency")
+            currency = CurrencyISOCodeField()
+            class Meta:
+                database = db
+
+        db.create_tables([Sale])
+        sale = Sale.create(amount=Decimal("10.25"), currency="usd")
+        Sale.create(amount="0.10", currency="usd")
+        Sale.create(amount=5, currency="eur")
+        self.assertEqual(Sale.get_by_id(sale.id).amount, Decimal("10.25"))
+        self.assertEqual(Sale.amount.db_value(1.1), 110)
+        self.assertEqual(Sale.select(Sale.amount.sum()).scalar(), Decimal("15.35"))
+        self.assertEqual(Sale.select(Sale.amount.avg()).scalar(), Decimal("5.12"))
+        self.assertEqual(Sale.amount.totals(), {"usd": Decimal("10.35"), "eur": Decimal("5.00")})
+        for value in ("1.001", "foo", Decimal("NaN"), 10 ** 17):
+            with self.assertRaises(ValueError):
+                Sale.amount.db_value(value)
+        Sale.delete().execute()
+
     def test_XMLField(self):
         class SVGImage(Model):
             data = XMLField()
@@ -479,6 +887,34 @@ class TestFields(unittest.TestCase):
         self.assertIsInstance(svg_img.data, str)
         vector_img.delete_instance()
 
+    def test_XMLField_limits(self):
+        valid_values = ("<svg/>", " <a><b>foo</b></a> ", '<a x="1"><b/><c/></a>')
+        invalid_values = ("", "<a>", "<a></b>", "foo", "<a/><b/>")
+
+        for value in valid_values:
+            self.assertEqual(XMLField(max_size=99, max_depth=2).db_value(value), value.strip())
+
+        for value in invalid_values[1:]:
+            with self.assertRaises(ValueError):
+                XMLField().db_value(value)
+
+        with self.assertRaises(ValueError):
+            XMLField(max_depth=2).db_value("<a><b><c/></b></a>")
+
+        with self.assertRaises(ValueError):
+            XMLField(max_size=9).db_value("<a><b><c/></b></a>")
+
+        with self.assertRaises(ValueError):
+            XMLField(forbid_entities=True).db_value(
+                '<!DOCTYPE a [<!ENTITY b "c">]><a>&b;</a>')
+
+    def test_XMLField_lazy(self):
+        value = XMLField(lazy=True).python_value("<svg><text>foo</text></svg>")
+        self.assertIsInstance(value, XMLString)
+        self.assertEqual(value, "<svg><text>foo</text></svg>")
+        self.assertEqual(value.element.find("text").text, "foo")
+        self.assertIs(value.element, value.element)  # Parsed only once.
+
     def test_File_write_path_file(self):
         folder_for_files = "unit_test\\"
 
@@ -495,6 +931,173 @@ class TestFields(unittest.TestCase):
         shutil.rmtree(folder_for_files)
         file.delete_instance()
 
+    def test_FileField_lazy(self):
+        folder_for_files = "unit_test_lazy\\"
+
+        class Attachment(Model):
+            data = FileField(folder_for_files=folder_for_files)
+            class Meta:
+                database = db
+
+        db.create_tables([Attachment])
+        attachment = Attachment.create(data="setup.py")
+        attachment = Attachment.get(id=attachment.id)
+        self.assertIsInstance(attachment.data, FileReference)
+        self.assertEqual(attachment.data.size, os.path.getsize("setup.py"))
+        self.assertEqual(attachment.data.read(), open("setup.py", "rb").read())
+        self.assertEqual(b"".join(attachment.data.iter_chunks(99)), attachment.data.bytecode)
+        with attachment.data.mmap() as mapped:
+            self.assertEqual(mapped[:9], attachment.data.bytecode[:9])
+
+        attachment.save()  # Saving a FileReference again must not copy it.
+        self.assertEqual(os.listdir(folder_for_files), ["setup.py"])
+        self.assertFalse(FileField(folder_for_files=folder_for_files).python_value("missing").exists())
+        shutil.rmtree(folder_for_files)
+        attachment.delete_instance()
+
+    def test_FileReference_http(self):
+        reference, content = FileReference("setup.py"), open("setup.py", "rb").read()
+        status, headers, start, stop = reference.http_response()
+        self.assertEqual((status, headers["Content-Length"]), (200, str(len(content))))
+        status, headers, start, stop = reference.http_response(range_header="bytes=2-5")
+        self.assertEqual((status, headers["Content-Range"]), (206, f"bytes 2-5/{len(content)}"))
+        self.assertEqual(b"".join(reference.iter_range(start, stop, 3)), content[2:6])
+        pread = os.pread  # Windows has no os.pread, seek() and read() then.
+        del os.pread
+        try:
+            self.assertEqual(b"".join(reference.iter_range(start, stop, 3)), content[2:6])
+        finally:
+            os.pread = pread
+        self.assertEqual(reference.http_response(range_header="bytes=-3")[2:], (len(content) - 3, len(content)))
+        self.assertEqual(reference.http_response(range_header="bytes=99999999-")[0], 416)
+        self.assertEqual(reference.http_response(range_header="bytes=2-5", if_range='"old"')[0], 200)
+        self.assertEqual(reference.http_response(if_none_match=reference.etag)[0], 304)
+        self.assertTrue(reference.not_modified(f'"other", W/{reference.etag}'))
+        self.assertFalse(reference.not_modified('"other", W/"other"'))
+        self.assertEqual(reference.http_response(if_modified_since=reference.last_modified)[0], 304)
+
+        left, right = socket.socketpair()
+        with left, right:
+            self.assertEqual(reference.sendfile(left, 2, 6), 4)
+            self.assertEqual(right.recv(4), content[2:6])
+        with tempfile.TemporaryFile() as out:
+            self.assertEqual(reference.sendfile(out), len(content))
+            out.seek(0)
+            self.assertEqual(out.read(), content)
+        out = io.BytesIO()  # No fileno(), mmap slices.
+        self.assertEqual(reference.sendfile(out, 10), len(content) - 10)
+        self.assertEqual(out.getvalue(), content[10:])
+
+    def test_FileField_sha256(self):
+        folder_for_files = "unit_test_sha256"
+
+        class Blob(Model):
+            data = FileField(folder_for_files=folder_for_files, storage="sha256")
+            class Meta:
+                database = db
+
+        db.create_tables([Blob])
+        first = Blob.create(data="setup.py")
+        second = Blob.create(data=open("setup.py", "rb"))  # Duplicate.
+        first, second = Blob.get_by_id(first.id), Blob.get_by_id(second.id)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(len(first.data.digest), 64)
+        self.assertEqual(first.data.size, os.path.getsize("setup.py"))
+        self.assertEqual(first.data.read(), open("setup.py", "rb").read())
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(folder_for_files)), 1)
+
+        with self.assertRaises(ValueError):
+            FileField(folder_for_files=folder_for_files, storage="foo")
+
+        shutil.rmtree(folder_for_files)
+        Blob.delete().execute()
+
+    def test_FileField_fan_out(self):
+        folder_for_files = "unit_test_fan_out"
+
+        class Sharded(Model):
+            data = FileField(folder_for_files=folder_for_files, fan_out=2)
+            class Meta:
+                database = db
+
+        db.create_tables([Sharded])
+        first = Sharded.create(data="setup.py")
+        second = Sharded.create(data=open("setup.py", "rb"))  # Same name.
+        first, second = Sharded.get_by_id(first.id), Sharded.get_by_id(second.id)
+        folder = os.path.dirname(first.data.file_path)
+        self.assertEqual(os.path.relpath(folder, folder_for_files).count(os.sep), 1)
+        self.assertEqual(first.data.file_path, os.path.join(folder, "setup.py"))
+        self.assertEqual(second.data.file_path, os.path.join(folder, "setup_1.py"))
+        self.assertEqual(second.data.read(), open("setup.py", "rb").read())
+        self.assertEqual(sorted(os.listdir(folder)), ["setup.py", "setup_1.py"])
+
+        shutil.rmtree(folder_for_files)
+        Sharded.delete().execute()
+
+    def test_FileField_workers(self):
+        folder_for_files = "unit_test_workers"
+
+        class Upload(Model):
+            data = FileField(folder_for_files=folder_for_files, workers=2)
+            class Meta:
+                database = db
+
+        db.create_tables([Upload])
+        for _ in range(5):
+            Upload.create(data="setup.py")
+        Upload.data.flush()
+        uploads = list(Upload.select())
+        self.assertEqual(len(set(upload.data for upload in uploads)), 5)
+        for upload in uploads:
+            self.assertEqual(open(upload.data, "rb").read(), open("setup.py", "rb").read())
+
+        closed = open("setup.py", "rb")
+        closed.close()
+        Upload.create(data=closed)  # Fails on the background thread.
+        with self.assertRaises(ValueError):
+            asyncio.run(self._await(Upload.data.writer))
+        Upload.data.flush()  # Errors are raised only once.
+
+        with self.assertRaises(ValueError):
+            FileField(folder_for_files=folder_for_files, storage="sha256", workers=2)
+
+        shutil.rmtree(folder_for_files)
+        Upload.delete().execute()
+
+    @staticmethod
+    async def _await(awaitable):
+        await awaitable
+
+    def test_sweep_orphans(self):
+        folder_for_files, quarantine = "unit_test_sweep", "unit_test_quarantine"
+
+        class Kept(Model):
+            data = FileField(folder_for_files=folder_for_files)
+            blob = FileField(folder_for_files=folder_for_files, storage="sha256")
+            class Meta:
+                database = db
+
+        db.create_tables([Kept])
+        kept = Kept.create(data="setup.py", blob="setup.py")
+        Kept.create(data="setup.py", blob="README.md").delete_instance()
+        open(os.path.join(folder_for_files, ".upload-inflight"), "w").close()
+
+        report = sweep_orphans([Kept.data, Kept.blob], min_age=0, run_size=2, batch_size=1)
+        self.assertEqual((report["files"], report["referenced"], report["orphans"]), (4, 2, 2))
+        self.assertEqual(report["removed"], 0)  # dry_run by default.
+        self.assertEqual(sweep_orphans([Kept.data, Kept.blob])["orphans"], 0)  # Too new.
+
+        report = sweep_orphans([Kept.data, Kept.blob], dry_run=False, quarantine=quarantine, min_age=0)
+        self.assertEqual(report["removed"], 2)
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(quarantine)), 2)
+        kept = Kept.get_by_id(kept.id)
+        self.assertTrue(kept.data.exists() and kept.blob.exists())
+        self.assertEqual(sweep_orphans([Kept.data, Kept.blob], min_age=0)["orphans"], 0)
+
+        shutil.rmtree(folder_for_files)
+        shutil.rmtree(quarantine)
+        Kept.delete().execute()
+
     def test_text_fields_with_validators(self):
         class TestTextField(Model):
             text_with_string = TextField(validators=["test", "test1"])
@@ -513,6 +1116,197 @@ class TestFields(unittest.TestCase):
 
         record.delete_instance()
 
+    def test_text_fields_compiled_validators(self):
+        field = TextField(validators=[f"user{i}" for i in range(10_000)] + [re.compile(r"admin\d+"), lambda value: isinstance(value, int)])
+        self.assertTrue(field.run_validators("user9999"))
+        self.assertTrue(field.run_validators("admin42"))
+        self.assertTrue(field.run_validators(4))
+        self.assertFalse(field.run_validators("admin42x"))
+        self.assertFalse(field.run_validators(["user1"]))  # Unhashable.
+        self.assertEqual(field.run_validators_many(["user1", "foo", 4]), [True, False, True])
+        self.assertEqual(TextField(validators=["a"]).run_validators_many(["a", "b"]), [True, False])
+        self.assertEqual(TextField().db_value("anything"), "anything")  # No validators.
+        with self.assertRaises(exceptions.ValidationError):
+            field.db_values(["user1", "foo"])
+        self.assertEqual(field.db_values(f"user{i}" for i in range(3)), ["user0", "user1", "user2"])
+        with self.assertRaises(exceptions.ValidationError):
+            field.db_values(value for value in ["user1", "foo"])
+
+    def test_JSONField_codecs(self):
+        value = {"name": "Zoe", "tags": ["python", "peewee"], "age": 30}
+
+        for codec in JSON_CODECS:
+            field = JSONField(codec=codec)
+            encoded = field.db_value(value)
+            self.assertIsInstance(encoded, str)
+            self.assertEqual(field.python_value(encoded), value)
+            self.assertEqual(field.python_value(encoded.encode()), value)
+            self.assertEqual(field.python_value(memoryview(encoded.encode())), value)
+            if JSON_CODECS[codec].binary:
+                self.assertIsInstance(JSONField(codec=codec, binary=True).db_value(value), bytes)
+
+        with self.assertRaises(ValueError):
+            JSONField(codec="not_a_json_codec")
+
+        field = JSONField()  # Default codec is never orjson, it is opt-in.
+        self.assertNotEqual(field.get_codec().name, "orjson")
+        self.assertEqual(field.python_value(field.db_value({1: "a"})), {"1": "a"})
+        self.assertEqual(field.python_value(field.db_value({"n": 2**70})), {"n": 2**70})
+        self.assertTrue(JSONField(codec="json").is_json('{"a": 1}'))
+
+    def test_JSONField_validate(self):
+        valid_values = ('{"a": 1}', ' [1, 2, 3] ', b'{"b": [true]}')
+        invalid_values = ('"foo"', '{"a": 1', "42")
+
+        for value in valid_values:
+            self.assertEqual(JSONField(validate="shallow").db_value(value), value)
+            self.assertEqual(JSONField(validate=None).db_value(value), value)
+
+        for value in invalid_values:
+            self.assertEqual(JSONField(validate=None).db_value(value), value)
+            with self.assertRaises(ValueError):
+                JSONField(validate="shallow").db_value(value)
+
+        with self.assertRaises(ValueError):
+            JSONField().db_value('{"a": 1')
+
+        with self.assertRaises(ValueError):
+            JSONField(validate="foo")
+
+    def test_JSONField_jsonb(self):
+        class Event(Model):
+            data = JSONField(jsonb=True, index=True)
+            class Meta:
+                database = db
+
+        self.assertEqual(Event.data.field_type, "jsonb")
+        self.assertEqual(Event.data.index_type, "GIN")
+        sql, params = Event.select().where(Event.data.contains({"a": 1})).sql()
+        self.assertIn("@>", sql)
+        self.assertEqual(params, [JSONField().db_value({"a": 1})])
+        sql, params = Event.select().where(Event.data.contained_by([1, 2])).sql()
+        self.assertIn("<@", sql)
+
+        class Log(Model):  # Not jsonb, contains() is the LIKE of peewee.
+            data = JSONField()
+            class Meta:
+                database = db
+
+        db.create_tables([Log])
+        Log.create(data={"message": "foo bar"})
+        sql, params = Log.select().where(Log.data.contains("foo")).sql()
+        self.assertNotIn("@>", sql)
+        self.assertEqual(Log.select().where(Log.data.contains("foo")).count(), 1)
+        self.assertEqual(Log.select().where(Log.data.contains("fo_")).count(), 0)
+        db.drop_tables([Log])
+
+    def test_JSONField_path(self):
+        class Invoice(Model):
+            data = JSONField()
+            class Meta:
+                database = db
+
+        db.create_tables([Invoice])
+        invoice = Invoice.create(data={"a": {"b": [5, "x", {"c": 1}]}})
+        Invoice.create(data={"a": {"b": [3, "y", {"c": 2}]}})
+        query = (Invoice
+                 .select(Invoice.data.path("a", "b", 1).alias("b1"),
+                         Invoice.data.path("a", "b", 2).as_json().alias("b2"))
+                 .where(Invoice.data.path("a", "b", 1) == "x")
+                 .order_by(Invoice.data.path("a", "b", 1)))
+        self.assertEqual(list(query.dicts()), [{"b1": "x", "b2": {"c": 1}}])
+
+        Invoice.delete().execute()  # Strings that look like other JSON stay str.
+        scalars = {"s": "123", "n": "null", "l": "[1]", "t": True, "i": 7, "z": None}
+        Invoice.create(data=scalars)
+        query = Invoice.select(*(Invoice.data.path(key).alias(key) for key in scalars))
+        self.assertEqual(query.dicts().get(), scalars)
+        query = Invoice.select().where(Invoice.data.path("s") == "123")
+        self.assertEqual(query.count(), 1)
+
+        Invoice.delete().execute()  # ->> is text on PostgreSQL, cast numbers.
+        for total in (9, 10, 100):
+            Invoice.create(data={"total": total})
+        total = Invoice.data.path("total").cast("numeric")
+        query = (Invoice.select(total.alias("total")).where(total > 9)
+                 .order_by(total.desc()))
+        self.assertEqual([row["total"] for row in query.dicts()], [100, 10])
+        class Bill(Model):
+            data = JSONField()
+            class Meta:  # SQL only, never connected.
+                database = PostgresqlDatabase("peewee_extra_fields")
+
+        total = Bill.data.path("total").cast("numeric")
+        sql, params = Bill.select(total).where(total > 9).sql()
+        self.assertIn('CAST(("t1"."data"->>%s) AS numeric) > %s', sql)
+        self.assertNotIn("AS text", sql)
+
+        with self.assertRaises(ValueError):
+            Invoice.data.path()
+
+        Invoice.delete().execute()
+
+    def test_JSONField_patch(self):
+        class Ticket(Model):
+            data = JSONField()
+            class Meta:
+                database = db
+
+        old = {"status": "new", "tags": ["a"], "user": {"id": 1, "name": "Zoe"}}
+        new = {"status": "done", "tags": ["a"], "user": {"id": 1}, "closed": True}
+        changes, remove = JSONField.diff(old, new)
+        self.assertEqual(changes, {("status", ): "done", ("closed", ): True})
+        self.assertEqual(remove, (("user", "name"), ))
+        self.assertEqual(Ticket.data.patch({(): [1]}), [1])
+        self.assertEqual(Ticket.data.patch({"a": 1}, document={}), {})
+
+        db.create_tables([Ticket])
+        ticket = Ticket.create(data=old)
+        Ticket.update({Ticket.data: Ticket.data.patch(changes, remove)}).execute()
+        self.assertEqual(Ticket.get_by_id(ticket.id).data, new)
+        ticket.delete_instance()
+
+    def test_Compressor(self):
+        value = "<svg>" + "<text>foo</text>" * 500 + "</svg>"
+        samples = [f'{{"id": {i}, "name": "user{i}", "active": true}}' for i in range(99)]
+
+        for compressor in (Compressor(), Compressor("lzma"), Compressor(
+                dictionary=Compressor.train_dictionary(samples, size=1_024))):
+            self.assertLess(len(compressor.compress(value)), len(value))
+            self.assertEqual(compressor.decompress(compressor.compress(value)), value.encode())
+            self.assertEqual(compressor.compress("foo"), b"\x00foo")  # Under threshold.
+            self.assertIsNone(compressor.compress(None))
+
+        with self.assertRaises(ValueError):
+            Compressor().decompress(Compressor(dictionary=b"foo" * 9).compress(value))
+
+        with self.assertRaises(ValueError):
+            Compressor("foo")
+
+    def test_compressed_fields(self):
+        class Document(Model):
+            json_data = JSONField(compressor=Compressor(threshold=64))
+            xml_data = XMLField(compressor=Compressor(threshold=64))
+            text_data = TextField(validators=[str], compressor=Compressor(threshold=64))
+            class Meta:
+                database = db
+
+        json_value = {"items": [{"id": i, "name": "foo"} for i in range(99)]}
+        xml_value = "<svg>" + "<text>foo</text>" * 99 + "</svg>"
+        text_value = "foo bar baz " * 99
+
+        db.create_tables([Document])
+        document = Document.create(json_data=json_value, xml_data=xml_value,
+                                   text_data=text_value)
+        document = Document.get_by_id(document.id)
+        self.assertEqual(document.json_data, json_value)
+        self.assertEqual(document.xml_data, xml_value)
+        self.assertEqual(document.text_data, text_value)
+        document.delete_instance()
+
+        with self.assertRaises(ValueError):
+            JSONField(jsonb=True, compressor=Compressor())
+
     @staticmethod
     def _check_validate_field(record, field_name, value):
         try: